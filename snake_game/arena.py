@@ -0,0 +1,48 @@
+import numpy as np
+
+from snake_game.neural_net import PopulationNet
+
+
+class Arena:
+    def __init__(self, snake_brains, rng=None):
+        # The brains and their games live for the whole run, every net is bound to one row of a shared matrix
+        self.snake_brains = snake_brains
+        self.rng = np.random.default_rng() if rng is None else rng
+
+        self.params = np.stack([snake_brain.params for snake_brain in snake_brains])
+        for snake_brain, params in zip(snake_brains, self.params):
+            snake_brain.bind(params)
+        self.population_net = PopulationNet(self.params, snake_brains[0].topology)
+
+        # Scratch space for building the next generation without allocating
+        num_pairs = len(snake_brains) // 2
+        self.children = np.empty_like(self.params)
+        # Both halves of every pair get their own buffer, copying between rows of one array would make numpy buffer
+        self.first_swap = np.empty((num_pairs, self.params.shape[1]))
+        self.second_swap = np.empty((num_pairs, self.params.shape[1]))
+        self.uniforms = np.empty((num_pairs, self.params.shape[1]))
+        self.cross_over_mask = np.empty((num_pairs, self.params.shape[1]), dtype=bool)
+
+    def __len__(self):
+        return len(self.snake_brains)
+
+    def next_generation(self, parent_indices, children_per_parent, mutator, cross_over_prob):
+        # Same recipe as the generational loop: every parent gets mutated copies, then neighbours cross over
+        parents = np.resize(np.repeat(parent_indices, children_per_parent), len(self))
+        np.take(self.params, parents, axis=0, out=self.children, mode="clip")
+        mutator.mutate(self.children)
+        self.cross_over_neighbours(cross_over_prob)
+
+        np.copyto(self.params, self.children)
+        for snake_brain in self.snake_brains:
+            snake_brain.game.reset()
+
+    def cross_over_neighbours(self, cross_over_prob):
+        num_pairs = len(self.first_swap)
+        first_children, second_children = self.children[0:2 * num_pairs:2], self.children[1:2 * num_pairs:2]
+        self.rng.random(out=self.uniforms)
+        np.less_equal(self.uniforms, cross_over_prob, out=self.cross_over_mask)
+        np.copyto(self.first_swap, first_children)
+        np.copyto(self.second_swap, second_children)
+        np.copyto(first_children, self.second_swap, where=self.cross_over_mask)
+        np.copyto(second_children, self.first_swap, where=self.cross_over_mask)
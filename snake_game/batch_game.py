@@ -0,0 +1,218 @@
+import numpy as np
+
+from snake_game.loop_detection import BatchLoopDetector, loop_credit, zobrist_keys
+from snake_game.sensors import batch_inputs
+
+
+class BatchGame:
+    # Heading indices line up with the output neurons of GameWithNet
+    UP = 0
+    DOWN = 1
+    RIGHT = 2
+    LEFT = 3
+    HEADINGS = np.array([[0, -1], [0, 1], [1, 0], [-1, 0]])
+    OPPOSITES = np.array([DOWN, UP, LEFT, RIGHT])
+
+    def __init__(self, num_games, screen_dims, tile_dims, life_time=200, seed=None, loop_penalty=None):
+        self.num_games = num_games
+        self.screen_dims = screen_dims
+        self.tile_dims = tile_dims
+        self.board_dims = (screen_dims[0] // tile_dims[0], screen_dims[1] // tile_dims[1])
+        self.num_cells = self.board_dims[0] * self.board_dims[1]
+        self.life_time = life_time
+        self.rng = np.random.default_rng(seed)
+
+        # Everything is in tile coordinates, cells are packed as y * columns + x
+        self.heads = np.zeros((num_games, 2), dtype=np.int64)
+        self.headings = np.full(num_games, BatchGame.RIGHT, dtype=np.int64)
+        self.food = np.zeros((num_games, 2), dtype=np.int64)
+        self.alive = np.zeros(num_games, dtype=bool)
+        self.ticks_since_eaten = np.zeros(num_games, dtype=np.int64)
+        self.ticks_since_start = np.zeros(num_games, dtype=np.int64)
+        # lengths counts pieces still waiting to grow in, the same way Snake.grow counts its sentinel pieces
+        self.lengths = np.zeros(num_games, dtype=np.int64)
+        self.pending_growth = np.zeros(num_games, dtype=np.int64)
+
+        # Each body is a ring buffer running from body_tails to body_heads inclusive
+        self.bodies = np.zeros((num_games, self.num_cells), dtype=np.int32)
+        self.body_heads = np.zeros(num_games, dtype=np.int64)
+        self.body_tails = np.zeros(num_games, dtype=np.int64)
+        self.occupancy = np.zeros((num_games, self.num_cells), dtype=np.uint8)
+
+        # With a food table every food position comes from its row of uniforms instead of self.rng, so games sharing a
+        # row see the same food for as long as they play the same
+        self.food_table = None
+        self.food_rows = None
+        self.food_draws = np.zeros(num_games, dtype=np.int64)
+
+        # Same as Game, with a penalty set snakes that repeat a state are cut off instead of circling until they starve
+        self.loop_penalty = loop_penalty
+        self.loop_detector = BatchLoopDetector(num_games) if loop_penalty is not None else None
+        self.keys = zobrist_keys(self.board_dims)
+        self.body_hashes = np.zeros(num_games, dtype=np.uint64)
+
+        self.reset()
+
+    @property
+    def start_pos(self):
+        return ((self.screen_dims[0] // 2) // self.tile_dims[0], (self.screen_dims[1] // 2) // self.tile_dims[1])
+
+    @property
+    def score(self):
+        return self.lengths * self.ticks_since_start
+
+    def any_alive(self):
+        return bool(self.alive.any())
+
+    def use_food_table(self, food_table, food_rows):
+        # food_table is (rows, draws) of uniforms in [0, 1), food_rows picks the row each game reads from
+        self.food_table = np.asarray(food_table)
+        self.food_rows = np.asarray(food_rows, dtype=np.int64)
+
+    def food_uniforms(self, games):
+        if self.food_table is None:
+            return self.rng.random(len(games))
+        draws = self.food_draws[games] % self.food_table.shape[1]
+        self.food_draws[games] += 1
+        return self.food_table[self.food_rows[games], draws]
+
+    def pack(self, positions):
+        return positions[..., 1] * self.board_dims[0] + positions[..., 0]
+
+    def reset(self, games=None):
+        games = np.arange(self.num_games) if games is None else np.asarray(games)
+        start_x, start_y = self.start_pos
+        start_cell = start_y * self.board_dims[0] + start_x
+
+        self.heads[games] = (start_x, start_y)
+        self.headings[games] = BatchGame.RIGHT
+        self.alive[games] = True
+        self.ticks_since_eaten[games] = 0
+        self.ticks_since_start[games] = 0
+        self.lengths[games] = 1
+        self.pending_growth[games] = 0
+        self.food_draws[games] = 0
+        self.body_hashes[games] = 0
+        if self.loop_detector is not None:
+            self.loop_detector.reset(games)
+
+        self.occupancy[games] = 0
+        self.body_heads[games] = 0
+        self.body_tails[games] = 0
+        self.bodies[games, 0] = start_cell
+        self.occupancy[games, start_cell] = 1
+
+        # Game.reset does not avoid the snake when placing the first piece of food
+        if self.food_table is None:
+            self.food[games, 0] = self.rng.integers(0, self.board_dims[0], size=len(games))
+            self.food[games, 1] = self.rng.integers(0, self.board_dims[1], size=len(games))
+        else:
+            self.food[games, 0] = (self.food_uniforms(games) * self.board_dims[0]).astype(np.int64)
+            self.food[games, 1] = (self.food_uniforms(games) * self.board_dims[1]).astype(np.int64)
+
+    def change_headings(self, directions):
+        directions = np.asarray(directions)
+        turning = directions >= 0
+        turning[turning] = directions[turning] != BatchGame.OPPOSITES[self.headings[turning]]
+        self.headings[turning] = directions[turning]
+
+    def step(self, directions=None):
+        if directions is not None:
+            self.change_headings(directions)
+
+        active = self.alive.copy()
+        starving = active & (self.ticks_since_eaten > self.life_time)
+        self.alive[starving] = False
+        self.ticks_since_start[active] += 1
+        self.ticks_since_eaten[active] += 1
+
+        movers = np.flatnonzero(active & ~starving)
+        new_heads = self.heads[movers] + BatchGame.HEADINGS[self.headings[movers]]
+        self.heads[movers] = new_heads
+
+        off_board = (new_heads[:, 0] < 0) | (new_heads[:, 0] >= self.board_dims[0]) \
+            | (new_heads[:, 1] < 0) | (new_heads[:, 1] >= self.board_dims[1])
+        cells = np.where(off_board, 0, self.pack(new_heads))
+        # The tail piece has not moved out of the way yet, so running into it is fatal just like in Snake.will_die
+        dying = off_board | (self.occupancy[movers, cells] != 0)
+        self.alive[movers[dying]] = False
+
+        surviving = ~dying
+        movers, cells, new_heads = movers[surviving], cells[surviving], new_heads[surviving]
+
+        old_heads = self.bodies[movers, self.body_heads[movers]]
+        self.body_hashes[movers] ^= self.keys.links[old_heads, self.keys.link_directions(old_heads, cells)]
+
+        growing = self.pending_growth[movers] > 0
+        self.pending_growth[movers[growing]] -= 1
+        shrinking = movers[~growing]
+        tails = self.body_tails[shrinking]
+        tail_cells = self.bodies[shrinking, tails]
+        self.occupancy[shrinking, tail_cells] = 0
+        self.body_tails[shrinking] = (tails + 1) % self.num_cells
+
+        self.body_heads[movers] = (self.body_heads[movers] + 1) % self.num_cells
+        self.bodies[movers, self.body_heads[movers]] = cells
+        self.occupancy[movers, cells] = 1
+        # Read after the new head is in, a one piece snake's tail links straight to it
+        next_cells = self.bodies[shrinking, self.body_tails[shrinking]]
+        self.body_hashes[shrinking] ^= self.keys.links[tail_cells, self.keys.link_directions(tail_cells, next_cells)]
+
+        ate = (new_heads == self.food[movers]).all(axis=1)
+        eating = movers[ate]
+        if len(eating):
+            self.eat(eating)
+        if self.loop_detector is not None:
+            self.cut_loops(movers[~ate], cells[~ate])
+
+    def cut_loops(self, games, head_cells):
+        state_hashes = self.body_hashes[games] ^ self.keys.heads[head_cells, self.headings[games]]
+        looping = games[self.loop_detector.seen(games, state_hashes)]
+        self.alive[looping] = False
+        self.ticks_since_start[looping] += loop_credit(self.life_time, self.ticks_since_eaten[looping],
+                                                       self.loop_penalty)
+
+    def eat(self, games):
+        self.ticks_since_eaten[games] = 0
+        if self.loop_detector is not None:
+            self.loop_detector.reset(games)
+        self.lengths[games] += 1
+        self.pending_growth[games] += 1
+        self.place_food(games)
+
+    def place_food(self, games):
+        # Picking the k-th free cell for a uniform k is the same distribution as Game.eat's resampling loop
+        free = self.occupancy[games] == 0
+        num_free = free.sum(axis=1)
+        has_room = num_free > 0
+        games, free, num_free = games[has_room], free[has_room], num_free[has_room]
+
+        chosen = (self.food_uniforms(games) * num_free).astype(np.int64)
+        cells = (free.cumsum(axis=1) > chosen[:, None]).argmax(axis=1)
+        self.food[games, 0] = cells % self.board_dims[0]
+        self.food[games, 1] = cells // self.board_dims[0]
+
+    def gen_inputs(self, games=None):
+        return batch_inputs(self, games)
+
+    def body_cells(self, game):
+        real_length = self.lengths[game] - self.pending_growth[game]
+        indices = (self.body_heads[game] - np.arange(real_length)) % self.num_cells
+        return self.bodies[game, indices]
+
+    def simulate(self, policy):
+        while self.any_alive():
+            self.step(policy(self))
+        return self.score
+
+
+if __name__ == "__main__":
+    import time
+
+    NUM_GAMES = 10000
+    batch_game = BatchGame(NUM_GAMES, (400, 400), (10, 10), seed=0)
+    policy_rng = np.random.default_rng(1)
+
+    start = time.perf_counter()
+    scores = batch_game.simulate(lambda game: policy_rng.integers(0, 4, size=game.num_games))
+    print("{} games in {:.2f}s, best score {}".format(NUM_GAMES, time.perf_counter() - start, scores.max()))
@@ -0,0 +1,69 @@
+import gc
+import tracemalloc
+
+from snake_game.game_state import Game
+from snake_game.snake_brain import GameWithNet
+
+SCREEN_WIDTH, SCREEN_HEIGHT = 400, 400
+TILE_WIDTH, TILE_HEIGHT = 10, 10
+HIDDEN_LAYERS = [64, 64]
+NUM_OUTPUTS = 4
+
+# Measured the same way on the tree before slots, the occupancy grid and the body hash went in, so a change in per
+# object memory shows up next to the current numbers instead of only in a commit message
+BASELINE = {
+    "bytes_per_game": 794,
+    "bytes_per_compact_state": None,
+    "bytes_per_brain": 42273,
+}
+
+
+# Built by hand instead of through snake_game.brains so the same benchmark still runs on the tree BASELINE came from
+def build_game():
+    game = Game((SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2), (TILE_WIDTH, TILE_HEIGHT), (50, 50),
+                (TILE_WIDTH, TILE_HEIGHT), (SCREEN_WIDTH, SCREEN_HEIGHT), 1)
+    game.reset()
+    return game
+
+
+def build_brain():
+    game_with_net = GameWithNet(build_game(), layers_list=[])
+    for num_neurons in HIDDEN_LAYERS + [NUM_OUTPUTS]:
+        game_with_net.add_randomised_layer_snake_weights(num_neurons, loc=0, scale=1 / 25)
+        game_with_net.add_randomised_layer_snake_bias(loc=0, scale=1 / 25)
+    return game_with_net
+
+
+def bytes_per_object(build, count):
+    # One object up front so caches shared by every object, like the Zobrist keys of a board, aren't counted
+    build()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [build() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / count
+
+
+def build_compact_state():
+    return build_game().compact_state()
+
+
+def run(count=2000):
+    return {
+        "bytes_per_game": bytes_per_object(build_game, count),
+        "bytes_per_compact_state": bytes_per_object(build_compact_state, count),
+        "bytes_per_brain": bytes_per_object(build_brain, count),
+    }
+
+
+if __name__ == "__main__":
+    for name, value in run().items():
+        baseline = BASELINE[name]
+        if baseline is None:
+            print("{}: {:.0f} (no baseline)".format(name, value))
+        else:
+            print("{}: {:.0f}, baseline {} ({:+.0f}, {:+.0%})".format(name, value, baseline, value - baseline,
+                                                                    (value - baseline) / baseline))
@@ -0,0 +1,37 @@
+import timeit
+
+from snake_game.brains import build_net
+from snake_game.mutation import Mutator
+from snake_game.neural_net import PopulationNet
+
+HIDDEN_LAYERS = [64, 64]
+MUTATION_RATE = 1 / 200
+
+
+def current_path(net):
+    child = net.deep_copy()
+    child.mutate_with_normal(loc=0, scale=MUTATION_RATE)
+    child.cap_one_value(-1, 1)
+    return child
+
+
+def run(population_size=200, repeats=20):
+    nets = [build_net(HIDDEN_LAYERS) for _ in range(population_size)]
+    population_net = PopulationNet.from_nets(nets)
+    dense = Mutator(MUTATION_RATE, seed=0)
+    sparse = Mutator(MUTATION_RATE, mutation_prob=0.05, seed=0)
+
+    def per_child(function):
+        return timeit.timeit(function, number=repeats) / (repeats * population_size) * 1e6
+
+    return {
+        "copy_mutate_cap_us_per_child": per_child(lambda: [current_path(net) for net in nets]),
+        "fused_us_per_child": per_child(lambda: [dense.mutate(net.params) for net in nets]),
+        "fused_population_us_per_child": per_child(lambda: dense.mutate(population_net.params)),
+        "sparse_population_us_per_child": per_child(lambda: sparse.mutate(population_net.params)),
+    }
+
+
+if __name__ == "__main__":
+    for name, value in run().items():
+        print("{}: {:.2f}".format(name, value))
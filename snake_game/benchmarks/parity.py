@@ -0,0 +1,85 @@
+import random
+
+import numpy as np
+
+from snake_game.batch_game import BatchGame
+from snake_game.game_state import Game
+from snake_game.snake import Snake
+
+SCREEN_WIDTH, SCREEN_HEIGHT = 200, 200
+TILE_WIDTH, TILE_HEIGHT = 10, 10
+LIFE_TIME = 60
+# Same order as BatchGame's heading indices
+DIRECTIONS = [Snake.UP, Snake.DOWN, Snake.RIGHT, Snake.LEFT]
+
+
+def build_games(num_games, loop_penalty):
+    games = []
+    for _ in range(num_games):
+        game = Game((SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2), (TILE_WIDTH, TILE_HEIGHT), (50, 50),
+                    (TILE_WIDTH, TILE_HEIGHT), (SCREEN_WIDTH, SCREEN_HEIGHT), 1, life_time=LIFE_TIME, realtime=False,
+                    loop_penalty=loop_penalty)
+        game.reset()
+        games.append(game)
+    return games
+
+
+def food_tile(game):
+    return game.food.pos[0] // TILE_WIDTH, game.food.pos[1] // TILE_HEIGHT
+
+
+def policy(games, rng, food_bias):
+    # Mostly heads for the food so snakes grow, with enough random turns to hit walls, themselves and loops
+    directions = rng.integers(0, 4, size=len(games))
+    for counter, game in enumerate(games):
+        if rng.random() < food_bias:
+            (food_x, food_y), (x, y) = game.food.pos, game.snake.pos
+            directions[counter] = BatchGame.RIGHT if food_x > x else BatchGame.LEFT if food_x < x \
+                else BatchGame.DOWN if food_y > y else BatchGame.UP
+    return directions
+
+
+def body_cells(game):
+    board_width = SCREEN_WIDTH // TILE_WIDTH
+    return [(y // TILE_HEIGHT) * board_width + x // TILE_WIDTH for x, y in game.snake.tail_pieces if x >= 0]
+
+
+def check_parity(num_games=300, seed=0, loop_penalty=None, food_bias=0.6):
+    # Steps Game objects and a BatchGame with the same policy and fails on the first tick where they disagree.
+    # The two draw food from different generators, so the batch is handed each game's food instead of placing its own
+    random.seed(seed)
+    games = build_games(num_games, loop_penalty)
+    batch_game = BatchGame(num_games, (SCREEN_WIDTH, SCREEN_HEIGHT), (TILE_WIDTH, TILE_HEIGHT), life_time=LIFE_TIME,
+                           seed=seed, loop_penalty=loop_penalty)
+    batch_game.food[:] = [food_tile(game) for game in games]
+    policy_rng = np.random.default_rng(seed)
+    # Counted the way MultiEpisodeEvaluator counts steps, every game still alive going into a tick
+    batch_ticks = np.zeros(num_games, dtype=np.int64)
+
+    tick = 0
+    while any(game.snake.alive for game in games):
+        directions = policy(games, policy_rng, food_bias)
+        for game, direction in zip(games, directions):
+            game.snake.change_heading(DIRECTIONS[direction])
+            game.update(game.dims)
+        batch_ticks += batch_game.alive
+        batch_game.step(directions)
+        batch_game.food[:] = [food_tile(game) for game in games]
+        tick += 1
+
+        for counter, game in enumerate(games):
+            where = "game {} tick {}".format(counter, tick)
+            assert game.snake.alive == batch_game.alive[counter], "alive differs in " + where
+            assert game.score == batch_game.score[counter], "score differs in " + where
+            assert game.simulated_ticks == batch_ticks[counter], "simulated ticks differ in " + where
+            if game.snake.alive:
+                assert body_cells(game) == batch_game.body_cells(counter).tolist(), "body differs in " + where
+                if loop_penalty is not None:
+                    assert game.snake.body_hash == batch_game.body_hashes[counter], "body hash differs in " + where
+    return tick
+
+
+if __name__ == "__main__":
+    for loop_penalty in (None, 0.0, 0.5):
+        ticks = check_parity(loop_penalty=loop_penalty)
+        print("loop_penalty {}: Game and BatchGame agree for all {} ticks".format(loop_penalty, ticks))
@@ -0,0 +1,41 @@
+import importlib
+import multiprocessing
+import sys
+import time
+
+HEADLESS_MODULES = ["snake_game.parallel_evaluator"]
+# What every worker used to pay for before the game rules stopped importing pygame
+WITH_PYGAME_MODULES = ["pygame"] + HEADLESS_MODULES
+
+
+def import_modules(module_names):
+    for module_name in module_names:
+        importlib.import_module(module_name)
+
+
+def pygame_loaded(_):
+    return "pygame" in sys.modules
+
+
+def cold_start(module_names, num_workers):
+    # Spawned workers start from a fresh interpreter, so each one pays for its own imports like on macOS and Windows
+    context = multiprocessing.get_context("spawn")
+    start = time.perf_counter()
+    with context.Pool(num_workers, initializer=import_modules, initargs=(module_names,)) as pool:
+        loaded = pool.map(pygame_loaded, range(num_workers), chunksize=1)
+    return time.perf_counter() - start, any(loaded)
+
+
+def run(num_workers=32):
+    headless_time, headless_pygame = cold_start(HEADLESS_MODULES, num_workers)
+    pygame_time, _ = cold_start(WITH_PYGAME_MODULES, num_workers)
+    return {
+        "headless_pool_start_s": headless_time,
+        "headless_workers_loaded_pygame": headless_pygame,
+        "pygame_pool_start_s": pygame_time,
+    }
+
+
+if __name__ == "__main__":
+    for name, value in run().items():
+        print("{}: {}".format(name, value))
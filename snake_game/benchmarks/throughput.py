@@ -0,0 +1,239 @@
+import argparse
+import json
+import platform
+import random
+import time
+
+import numpy as np
+
+from snake_game.arena import Arena
+from snake_game.brains import build_game, build_net, build_snake_brain
+from snake_game.mutation import Mutator
+from snake_game.neural_net import PopulationNet
+from snake_game.selection import tournament
+from snake_game.snake_brain import GameWithNet
+
+TILE_WIDTH, TILE_HEIGHT = 10, 10
+INPUT_NEURONS = GameWithNet.INPUT_NEURONS
+HIDDEN_LAYERS = [64, 64]
+LIFE_TIME = 200
+MUTATION_RATE = 1 / 200
+CROSS_OVER_RATE = 0.5
+TOURNAMENT_COUNT = 2
+
+# Game updates run over every board and snake length, the full loop varies one of population or board at a time
+FULL_SWEEPS = {
+    "population": [50, 200, 800],
+    "board": [(20, 20), (40, 40), (80, 80)],
+    "snake_length": [1, 50, 200],
+}
+QUICK_SWEEPS = {
+    "population": [50, 200],
+    "board": [(20, 20), (40, 40)],
+    "snake_length": [1, 50],
+}
+
+
+def rate(function, min_time=0.2):
+    # Calls function until min_time has passed, function returns how many units of work it did
+    units, start = 0, time.perf_counter()
+    while True:
+        units += function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return units / elapsed
+
+
+def game_config(board):
+    return (board[0] * TILE_WIDTH, board[1] * TILE_HEIGHT), (TILE_WIDTH, TILE_HEIGHT), LIFE_TIME, None
+
+
+def long_snake_state(game, snake_length):
+    # Body snakes back and forth along the top rows with the head turned down into the empty part of the board
+    columns = game.snake.board_dims[0]
+    path = []
+    for row in range(-(-snake_length // columns)):
+        cells = [row * columns + column for column in range(columns)]
+        path += cells if row % 2 == 0 else cells[::-1]
+    body = path[:snake_length][::-1]
+    head_pos = game.snake.cell_pos(body[0])
+    food_pos = (0, game.dims[1] - TILE_HEIGHT)
+    return np.array([*head_pos, 0, 1, *food_pos, 1, 0, 0, 0, *body], dtype=np.int32)
+
+
+def game_ticks_per_second(board, snake_length):
+    game = build_game(game_config(board))
+    state = long_snake_state(game, snake_length)
+    game.life_time = np.iinfo(np.int32).max
+
+    def ticks():
+        # Only the ticks are timed, putting the snake back after it hits the wall is left out
+        game.load_compact_state(state)
+        start, count = time.perf_counter(), 0
+        while game.snake.alive:
+            game.update(game.dims)
+            count += 1
+        return count, time.perf_counter() - start
+
+    total_ticks, total_time = 0, 0
+    while total_time < 0.2:
+        count, elapsed = ticks()
+        total_ticks, total_time = total_ticks + count, total_time + elapsed
+    return total_ticks / total_time
+
+
+def forward_passes_per_second(population):
+    nets = [build_net(HIDDEN_LAYERS) for _ in range(population)]
+    inputs = np.random.uniform(0, 100, size=(population, INPUT_NEURONS))
+
+    def one_at_a_time():
+        for net, inp in zip(nets, inputs):
+            net.gen_output(inp)
+        return population
+
+    population_net = PopulationNet.from_nets(nets)
+
+    def batched():
+        population_net.gen_output(inputs)
+        return population
+
+    return rate(one_at_a_time), rate(batched)
+
+
+def layer_ops_per_second():
+    first, second = build_net(HIDDEN_LAYERS), build_net(HIDDEN_LAYERS)
+    layer = first.net[0]
+    other = second.net[0]
+    mutator = Mutator(MUTATION_RATE, seed=0)
+
+    def cross_over():
+        layer.cross_over_uniform_multiple(other, CROSS_OVER_RATE)
+        return 1
+
+    def mutate():
+        layer.mutate_with_normal(scale=MUTATION_RATE)
+        layer.cap(-1, 1)
+        return 1
+
+    def mutate_fused():
+        mutator.mutate(layer.array)
+        return 1
+
+    def net_cross_over():
+        first.cross_over_uniform_single(second, CROSS_OVER_RATE)
+        return 1
+
+    return {
+        "layer_cross_over": rate(cross_over),
+        "layer_mutate": rate(mutate),
+        "layer_fused_mutate": rate(mutate_fused),
+        "net_cross_over": rate(net_cross_over),
+    }
+
+
+def build_brains(population, board):
+    return [build_snake_brain(game_config(board), HIDDEN_LAYERS) for _ in range(population)]
+
+
+def generations_per_minute(population, board, num_generations=3):
+    # The headless training loop from snake_brain: simulate, select, breed, reset
+    arena = Arena(build_brains(population, board), rng=np.random.default_rng(0))
+    mutator = Mutator(MUTATION_RATE, seed=0)
+    selection_rng = np.random.default_rng(0)
+    screen_dims = arena.snake_brains[0].game.dims
+
+    start = time.perf_counter()
+    for _ in range(num_generations):
+        GameWithNet.simulate_no_video(arena.snake_brains, *screen_dims, population_net=arena.population_net)
+        scores = [snake_brain.game.score for snake_brain in arena.snake_brains]
+        parent_indices = tournament(scores, TOURNAMENT_COUNT, rng=selection_rng)
+        arena.next_generation(parent_indices, TOURNAMENT_COUNT, mutator, CROSS_OVER_RATE)
+    return num_generations / (time.perf_counter() - start) * 60
+
+
+def result(benchmark, value, unit, **params):
+    return {"benchmark": benchmark, "params": params, "value": value, "unit": unit}
+
+
+def run(sweeps=QUICK_SWEEPS, num_generations=3):
+    random.seed(0)
+    np.random.seed(0)
+    default_population, default_board = sweeps["population"][0], sweeps["board"][0]
+    results = []
+
+    for board in sweeps["board"]:
+        for snake_length in sweeps["snake_length"]:
+            if snake_length < board[0] * (board[1] - 1):
+                results.append(result("game_update", game_ticks_per_second(board, snake_length), "ticks/sec",
+                                      board=list(board), snake_length=snake_length))
+
+    for population in sweeps["population"]:
+        single, batched = forward_passes_per_second(population)
+        results.append(result("net_gen_output", single, "passes/sec", population=population))
+        results.append(result("population_net_gen_output", batched, "passes/sec", population=population))
+
+    for name, value in layer_ops_per_second().items():
+        results.append(result(name, value, "ops/sec"))
+
+    for population in sweeps["population"]:
+        results.append(result("full_loop", generations_per_minute(population, default_board, num_generations),
+                              "generations/min", population=population, board=list(default_board)))
+    for board in sweeps["board"][1:]:
+        results.append(result("full_loop", generations_per_minute(default_population, board, num_generations),
+                              "generations/min", population=default_population, board=list(board)))
+    return results
+
+
+def metadata():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def save(path, results):
+    with open(path, "w") as results_file:
+        json.dump({"meta": metadata(), "results": results}, results_file, indent=2)
+
+
+def load(path):
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def key(entry):
+    return entry["benchmark"], json.dumps(entry["params"], sort_keys=True)
+
+
+def compare(baseline, current, tolerance=0.1):
+    # Every benchmark is a rate, so anything that dropped by more than tolerance counts as a regression
+    baseline_values = {key(entry): entry["value"] for entry in baseline["results"]}
+    rows = []
+    for entry in current["results"]:
+        if key(entry) in baseline_values:
+            ratio = entry["value"] / baseline_values[key(entry)]
+            rows.append((entry["benchmark"], entry["params"], ratio, ratio < 1 - tolerance))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput of the simulation, the nets and the GA operators")
+    parser.add_argument("--full", action="store_true", help="run the full sweeps instead of the quick ones")
+    parser.add_argument("--generations", type=int, default=3, help="generations timed per full loop benchmark")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--compare", help="compare against the results in this JSON file")
+    args = parser.parse_args()
+
+    results = run(FULL_SWEEPS if args.full else QUICK_SWEEPS, num_generations=args.generations)
+    for entry in results:
+        print("{:<32} {:<40} {:>14.1f} {}".format(entry["benchmark"], json.dumps(entry["params"]), entry["value"],
+                                                  entry["unit"]))
+    if args.output:
+        save(args.output, results)
+    if args.compare:
+        for benchmark, params, ratio, regressed in compare(load(args.compare), {"results": results}):
+            print("{:<32} {:<40} {:>6.2f}x{}".format(benchmark, json.dumps(params), ratio,
+                                                     "  REGRESSION" if regressed else ""))
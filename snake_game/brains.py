@@ -0,0 +1,48 @@
+import numpy as np
+
+from snake_game.game_state import Game
+from snake_game.neural_net import NeuralNet
+from snake_game.snake_brain import GameWithNet
+
+NUM_OUTPUTS = 4
+# Every fresh brain starts from small normal weights and biases around zero
+INIT_SCALE = 1 / 25
+
+
+def derive_seed(*keys):
+    # A 32 bit seed per combination of keys, like (seed, island) or (seed, generation, chunk), that looks unrelated to
+    # the seeds of neighbouring combinations
+    return int(np.random.SeedSequence(list(keys)).generate_state(1)[0])
+
+
+def build_game(game_config):
+    # game_config is (screen_dims, tile_dims, life_time, loop_penalty), the snake starts headless in the middle
+    screen_dims, tile_dims, life_time, loop_penalty = game_config
+    screen_dims, tile_dims = tuple(screen_dims), tuple(tile_dims)
+    game = Game((screen_dims[0] // 2, screen_dims[1] // 2), tile_dims, (0, 0), tile_dims, screen_dims,
+                GameWithNet.regular_tick_speed, life_time=life_time, realtime=False, loop_penalty=loop_penalty)
+    game.reset()
+    return game
+
+
+def build_net(hidden_layers, num_inputs=GameWithNet.INPUT_NEURONS, num_outputs=NUM_OUTPUTS):
+    net = NeuralNet([])
+    input_neurons = num_inputs
+    for num_neurons in list(hidden_layers) + [num_outputs]:
+        net.add_randomised_layer_weights(input_neurons, num_neurons, scale=INIT_SCALE)
+        net.add_randomised_layer_bias(num_neurons, scale=INIT_SCALE)
+        input_neurons = num_neurons
+    return net
+
+
+def build_snake_brain(game_config, hidden_layers=(64, 64), num_outputs=NUM_OUTPUTS, params=None, topology=None):
+    # A fresh randomised brain with hidden_layers, or with params given one laid out as topology around them
+    game = build_game(game_config)
+    if params is not None:
+        return GameWithNet(game, NeuralNet.layers_from_params(params, topology), params=params)
+
+    snake_brain = GameWithNet(game, layers_list=[])
+    for num_neurons in list(hidden_layers) + [num_outputs]:
+        snake_brain.add_randomised_layer_snake_weights(num_neurons, loc=0, scale=INIT_SCALE)
+        snake_brain.add_randomised_layer_snake_bias(loc=0, scale=INIT_SCALE)
+    return snake_brain
@@ -0,0 +1,90 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+from snake_game.neural_net import NeuralNet
+
+MAGIC = b"SNAKENET"
+VERSION = 1
+# The weight block starts on a multiple of this so it can be memory-mapped straight off the disk
+ALIGNMENT = 64
+
+
+class PopulationCheckpoint:
+    def __init__(self, weights, topology, scores=None):
+        # weights is one (population, parameters) block, topology is the (shape, type) of every layer in order
+        self.weights = weights
+        self.topology = topology
+        self.scores = scores
+
+    def __len__(self):
+        return self.weights.shape[0]
+
+    def net(self, index, copy=False):
+        # Without copy the layers are read-only views into the mapped file
+        params = np.array(self.weights[index], dtype=np.float64) if copy else self.weights[index]
+        return NeuralNet.from_params(params, self.topology)
+
+    def nets(self, copy=False):
+        return [self.net(index, copy=copy) for index in range(len(self))]
+
+
+def save_population(path, nets, scores=None, dtype=np.float32):
+    topology = nets[0].topology
+    for net in nets[1:]:
+        if net.topology != topology:
+            raise ValueError("Nets need to share the same topology to be checkpointed together!")
+
+    dtype = np.dtype(dtype).newbyteorder("<")
+    header = json.dumps({
+        "version": VERSION,
+        "dtype": dtype.str,
+        "population": len(nets),
+        "layers": [{"shape": list(shape), "type": type} for shape, type in topology],
+        "has_scores": scores is not None,
+    }).encode("utf-8")
+    prefix_size = len(MAGIC) + 4 + len(header)
+    padding = -prefix_size % ALIGNMENT
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as checkpoint_file:
+        checkpoint_file.write(MAGIC)
+        checkpoint_file.write(struct.pack("<I", len(header) + padding))
+        checkpoint_file.write(header + b" " * padding)
+        for net in nets:
+            checkpoint_file.write(net.params.astype(dtype).tobytes())
+        if scores is not None:
+            checkpoint_file.write(np.asarray(scores, dtype="<f8").tobytes())
+    os.replace(temp_path, path)
+
+
+def load_population(path, mode="r"):
+    with open(path, "rb") as checkpoint_file:
+        if checkpoint_file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("{} is not a snake net checkpoint".format(path))
+        header_size, = struct.unpack("<I", checkpoint_file.read(4))
+        header = json.loads(checkpoint_file.read(header_size).decode("utf-8"))
+    if header["version"] != VERSION:
+        raise ValueError("Unsupported checkpoint version {}".format(header["version"]))
+
+    topology = [(tuple(layer["shape"]), layer["type"]) for layer in header["layers"]]
+    num_params = sum(int(np.prod(shape)) for shape, _ in topology)
+    dtype = np.dtype(header["dtype"])
+    offset = len(MAGIC) + 4 + header_size
+
+    weights = np.memmap(path, dtype=dtype, mode=mode, offset=offset, shape=(header["population"], num_params))
+    scores = None
+    if header["has_scores"]:
+        scores = np.memmap(path, dtype="<f8", mode=mode, offset=offset + weights.nbytes,
+                           shape=(header["population"],))
+    return PopulationCheckpoint(weights, topology, scores)
+
+
+def save_net(path, net, dtype=np.float64):
+    save_population(path, [net], dtype=dtype)
+
+
+def load_net(path, copy=True):
+    return load_population(path).net(0, copy=copy)
@@ -0,0 +1,252 @@
+import argparse
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+from snake_game.arena import Arena
+from snake_game.brains import build_snake_brain
+from snake_game.checkpoint import load_population, save_population
+from snake_game.instrumentation import profiler
+from snake_game.mutation import Mutator
+from snake_game.population_store import PopulationStore
+from snake_game.selection import tournament
+from snake_game.snake_brain import GameWithNet
+
+# Same values the training script used to hard-code, a config file overrides these and the command line overrides both
+DEFAULT_CONFIG = {
+    "population": 200,
+    "generations": 50,
+    "hidden_layers": [64, 64],
+    "board": [40, 40],
+    "tile": [10, 10],
+    "life_time": 200,
+    "mutation_rate": 1 / 200,
+    "cross_over_rate": 0.5,
+    "tournament_size": 2,
+    "seed": 0,
+    "workers": 1,
+    "episodes": 1,
+    "loop_penalty": 0.0,
+    "hall_of_fame": 10,
+    "history_dir": None,
+    "checkpoint": None,
+    "profile": None,
+    "profile_allocations": False,
+    "time_budget": None,
+    "step_budget": None,
+    "render": False,
+    "watch": False,
+    "watch_fps": 30,
+    "replay_best": False,
+    "save_best": None,
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Evolve snake brains")
+    parser.add_argument("--config", help="JSON file with any of the settings below, keyed by their long names")
+    parser.add_argument("--population", type=int, help="number of snakes per generation")
+    parser.add_argument("--generations", type=int, help="number of generations to run at most")
+    parser.add_argument("--hidden-layers", type=int, nargs="+", help="neurons in each hidden layer")
+    parser.add_argument("--board", type=int, nargs=2, metavar=("COLUMNS", "ROWS"), help="board size in tiles")
+    parser.add_argument("--tile", type=int, nargs=2, metavar=("WIDTH", "HEIGHT"), help="tile size in pixels")
+    parser.add_argument("--life-time", type=int, help="ticks a snake survives without eating")
+    parser.add_argument("--mutation-rate", type=float, help="standard deviation of the mutation noise")
+    parser.add_argument("--cross-over-rate", type=float, help="chance of swapping each weight between neighbours")
+    parser.add_argument("--tournament-size", type=int, help="brains per tournament, also children per winner")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workers", type=int, help="evaluate in a process pool of this many workers")
+    parser.add_argument("--episodes", type=int, help="score every brain on the mean of this many batched games")
+    parser.add_argument("--loop-penalty", type=float, help="fraction of the remaining ticks a looping snake loses")
+    parser.add_argument("--no-loop-detection", action="store_true", help="let looping snakes run until they starve")
+    parser.add_argument("--hall-of-fame", type=int, help="number of best brains kept across generations")
+    parser.add_argument("--history-dir", help="write every generation's weights and scores here")
+    parser.add_argument("--checkpoint", help="save the population here every generation and resume from it")
+    parser.add_argument("--profile", help="stream per-phase timings to this .csv or .jsonl file")
+    parser.add_argument("--profile-allocations", action="store_const", const=True,
+                        help="also record the memory each phase leaves allocated, slows training down")
+    parser.add_argument("--time-budget", type=float, help="stop after the generation that passes this many seconds")
+    parser.add_argument("--step-budget", type=int, help="stop after the generation that passes this many game ticks")
+    parser.add_argument("--render", action="store_const", const=True, help="watch every generation in a window")
+    parser.add_argument("--watch", action="store_const", const=True,
+                        help="watch training in a separate window without slowing it down")
+    parser.add_argument("--watch-fps", type=int, help="frame rate the --watch window is capped at")
+    parser.add_argument("--replay-best", action="store_const", const=True, help="replay the best snake at the end")
+    parser.add_argument("--save-best", help="save the best brain's net to this file at the end")
+    return parser
+
+
+def load_config(path):
+    with open(path) as config_file:
+        config = json.load(config_file)
+    unknown = set(config) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError("Unknown settings in {}: {}".format(path, ", ".join(sorted(unknown))))
+    return config
+
+
+def parse_config(argv=None):
+    args = vars(build_parser().parse_args(argv))
+    config = dict(DEFAULT_CONFIG)
+    config_path = args.pop("config")
+    no_loop_detection = args.pop("no_loop_detection")
+    if config_path is not None:
+        config.update(load_config(config_path))
+    config.update({name: value for name, value in args.items() if value is not None})
+    if no_loop_detection:
+        config["loop_penalty"] = None
+    return config
+
+
+def check_config(config):
+    if not 1 <= config["tournament_size"] <= config["population"]:
+        raise ValueError("tournament_size is {} but has to be between 1 and the population of {}".format(
+            config["tournament_size"], config["population"]))
+    if config["profile_allocations"] and config["profile"] is None:
+        raise ValueError("profile_allocations only has an effect together with a profile file")
+    # Games played in worker processes never reach the viewer, every other evaluator publishes to it
+    if config["watch"] and config["episodes"] == 1 and config["workers"] > 1:
+        raise ValueError("watch can't show games played by workers, use a single worker or more than one episode")
+    # Only the plain single worker, single episode loop can draw its games, any evaluator plays them headless
+    if config["render"] and (config["episodes"] > 1 or config["workers"] > 1):
+        raise ValueError("render only works with one worker and one episode, use watch for more episodes")
+    if config["render"] and config["watch"]:
+        raise ValueError("render and watch can't be used together, the rendered games never reach the viewer")
+
+
+def screen_dims(config):
+    return config["board"][0] * config["tile"][0], config["board"][1] * config["tile"][1]
+
+
+def game_config(config):
+    return screen_dims(config), tuple(config["tile"]), config["life_time"], config["loop_penalty"]
+
+
+def build_population(config, resume_from=None):
+    if resume_from is not None:
+        return [build_snake_brain(game_config(config), params=net.params, topology=net.topology)
+                for net in resume_from.nets(copy=True)]
+    return [build_snake_brain(game_config(config), config["hidden_layers"]) for _ in range(config["population"])]
+
+
+def build_evaluator(config):
+    if config["episodes"] > 1:
+        from snake_game.evaluation import MultiEpisodeEvaluator
+        return MultiEpisodeEvaluator(screen_dims(config), config["tile"], num_episodes=config["episodes"],
+                                     life_time=config["life_time"], seed=config["seed"],
+                                     loop_penalty=config["loop_penalty"])
+    if config["workers"] > 1:
+        from snake_game.parallel_evaluator import ParallelEvaluator
+        return ParallelEvaluator(screen_dims(config), config["tile"], num_workers=config["workers"],
+                                 life_time=config["life_time"], seed=config["seed"],
+                                 loop_penalty=config["loop_penalty"])
+    return None
+
+
+def evaluate(config, arena, evaluator, viewer=None):
+    # Returns the scores and how many game ticks they took
+    if evaluator is not None:
+        steps_before = evaluator.total_steps
+        if config["episodes"] > 1:
+            scores = evaluator.evaluate(arena.population_net, viewer)
+        else:
+            with profiler.phase("evaluation"):
+                scores = evaluator.evaluate(arena.snake_brains)
+        return scores, evaluator.total_steps - steps_before
+
+    if config["render"]:
+        GameWithNet.simulate_with_video(arena.snake_brains, *screen_dims(config), False)
+    else:
+        GameWithNet.simulate_no_video(arena.snake_brains, *screen_dims(config), population_net=arena.population_net,
+                                      viewer=viewer)
+    scores = [snake_brain.game.score for snake_brain in arena.snake_brains]
+    return scores, sum(snake_brain.game.simulated_ticks for snake_brain in arena.snake_brains)
+
+
+def train(config, log=print, on_generation=None):
+    # on_generation gets (generation, scores, best score so far, total steps) after every generation
+    random.seed(config["seed"])
+    np.random.seed(config["seed"])
+    if config["profile"] is not None:
+        profiler.enable(config["profile"], track_allocations=config["profile_allocations"])
+
+    # Independent streams for mutation noise, tournaments and crossover masks, all from the one seed
+    mutation_seed, selection_seed, arena_seed = np.random.SeedSequence(config["seed"]).spawn(3)
+    mutator = Mutator(config["mutation_rate"], min_value=-1, max_value=1, seed=mutation_seed)
+    selection_rng = np.random.default_rng(selection_seed)
+    resume_from = None
+    if config["checkpoint"] is not None and os.path.exists(config["checkpoint"]):
+        resume_from = load_population(config["checkpoint"])
+        config["population"] = len(resume_from)
+    check_config(config)
+    population = PopulationStore(config["population"], hall_of_fame_size=config["hall_of_fame"],
+                                 history_dir=config["history_dir"])
+    population.set_generation(build_population(config, resume_from))
+    arena = Arena(population.current, rng=np.random.default_rng(arena_seed))
+    evaluator = build_evaluator(config)
+    viewer = None
+    if config["watch"]:
+        from snake_game.viewer import Viewer
+        viewer = Viewer(screen_dims(config), fps=config["watch_fps"])
+
+    start, total_steps = time.perf_counter(), 0
+    try:
+        for generation in range(config["generations"]):
+            scores, steps = evaluate(config, arena, evaluator, viewer)
+            total_steps += steps
+
+            with profiler.phase("bookkeeping"):
+                population.record_scores(scores)
+                best_snake, best_score = population.best()
+            elapsed = time.perf_counter() - start
+            log("generation {} / {}: best {} this generation {} steps {} time {:.1f}s".format(
+                generation + 1, config["generations"], best_score, max(scores), total_steps, elapsed))
+            if on_generation is not None:
+                on_generation(generation, scores, best_score, total_steps)
+
+            with profiler.phase("selection"):
+                parent_indices = tournament(scores, config["tournament_size"], rng=selection_rng)
+            with profiler.phase("breeding"):
+                arena.next_generation(parent_indices, config["tournament_size"], mutator, config["cross_over_rate"])
+            if config["checkpoint"] is not None:
+                with profiler.phase("checkpoint"):
+                    save_population(config["checkpoint"], population.current, dtype=np.float64)
+            profiler.end_generation(generation)
+
+            if config["time_budget"] is not None and elapsed >= config["time_budget"]:
+                log("time budget of {}s used up".format(config["time_budget"]))
+                break
+            if config["step_budget"] is not None and total_steps >= config["step_budget"]:
+                log("step budget of {} ticks used up".format(config["step_budget"]))
+                break
+    finally:
+        if evaluator is not None:
+            evaluator.close()
+        if viewer is not None:
+            viewer.close()
+
+    return population.best()
+
+
+def main(argv=None):
+    config = parse_config(argv)
+    try:
+        check_config(config)
+    except ValueError as error:
+        build_parser().error(str(error))
+    best_snake, best_score = train(config)
+    if config["save_best"] is not None and best_snake is not None:
+        from snake_game.checkpoint import save_net
+        save_net(config["save_best"], best_snake)
+    if config["replay_best"] and best_snake is not None:
+        best_snake.game.reset()
+        best_snake.game.tick_rate = 50
+        GameWithNet.simulate_with_video([best_snake], *best_snake.game.dims, True, True)
+    return best_score
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import numpy as np
+
+from snake_game.batch_game import BatchGame
+from snake_game.instrumentation import profiler
+from snake_game.viewer import Snapshot
+
+
+def episode_seed(seed, generation):
+    return np.random.SeedSequence([seed, generation])
+
+
+def summarise(episode_scores, percentile=25):
+    # episode_scores is (brains, episodes), every statistic comes back with one value per brain
+    return {
+        "mean": episode_scores.mean(axis=1),
+        "min": episode_scores.min(axis=1),
+        "percentile": np.percentile(episode_scores, percentile, axis=1),
+    }
+
+
+class MultiEpisodeEvaluator:
+    def __init__(self, screen_dims, tile_dims, num_episodes=4, life_time=200, seed=0, fitness="mean",
+                 percentile=25, loop_penalty=None):
+        self.screen_dims = tuple(screen_dims)
+        self.tile_dims = tuple(tile_dims)
+        self.num_episodes = num_episodes
+        self.life_time = life_time
+        self.seed = seed
+        # Which of the summarise statistics gets handed back as the fitness to select on
+        self.fitness = fitness
+        self.percentile = percentile
+        self.loop_penalty = loop_penalty
+
+        self.generation = 0
+        self.total_steps = 0
+        self.episode_scores = None
+        self.stats = None
+        self.batch_game = None
+
+    def games_for(self, num_brains):
+        # Game number brain * num_episodes + episode, so the scores reshape straight into (brains, episodes)
+        num_games = num_brains * self.num_episodes
+        if self.batch_game is None or self.batch_game.num_games != num_games:
+            self.batch_game = BatchGame(num_games, self.screen_dims, self.tile_dims, life_time=self.life_time,
+                                        loop_penalty=self.loop_penalty)
+        return self.batch_game
+
+    def food_table(self, batch_game):
+        # Common random numbers: every brain plays episode k with the same food uniforms this generation. A snake can
+        # never eat more food than there are cells, so one uniform per cell plus the first food's x and y is enough
+        rng = np.random.default_rng(episode_seed(self.seed, self.generation))
+        return rng.random((self.num_episodes, batch_game.num_cells + 2))
+
+    def evaluate(self, population_net, viewer=None):
+        num_brains = len(population_net)
+        batch_game = self.games_for(num_brains)
+        batch_game.use_food_table(self.food_table(batch_game), np.tile(np.arange(self.num_episodes), num_brains))
+        batch_game.reset()
+
+        options = np.empty(batch_game.num_games, dtype=np.int64)
+        while batch_game.any_alive():
+            # Only ticks that were actually simulated, loops that got cut off are credited to the score for free
+            live = np.flatnonzero(batch_game.alive)
+            ticks = len(live)
+            self.total_steps += ticks
+            # Sensors only run for live games and the net only for brains with a live game left, each getting a
+            # (episodes, inputs) block where its finished episodes are left at zero
+            live_brains = np.unique(live // self.num_episodes)
+            slots = np.searchsorted(live_brains, live // self.num_episodes) * self.num_episodes \
+                + live % self.num_episodes
+            with profiler.phase("sensors"):
+                live_inputs = batch_game.gen_inputs(live)
+                inputs = np.zeros((len(live_brains) * self.num_episodes, live_inputs.shape[1]))
+                inputs[slots] = live_inputs
+            with profiler.phase("inference"):
+                rows = None if len(live_brains) == num_brains else live_brains
+                outputs = population_net.gen_output(inputs.reshape(len(live_brains), self.num_episodes, -1),
+                                                    rows=rows)
+                # Finished games get -1, which change_headings skips
+                options.fill(-1)
+                options[live] = outputs.reshape(-1, outputs.shape[2])[slots].argmax(axis=1)
+            profiler.count("inference", "forward_passes", len(live_brains) * self.num_episodes)
+            with profiler.phase("physics"):
+                batch_game.step(options)
+            profiler.count("physics", "ticks", ticks)
+            if viewer is not None and viewer.due():
+                viewer.publish(Snapshot.from_batch_game(batch_game))
+
+        self.generation += 1
+        self.episode_scores = batch_game.score.reshape(num_brains, self.num_episodes)
+        self.stats = summarise(self.episode_scores, self.percentile)
+        return self.stats[self.fitness]
+
+    def close(self):
+        # Nothing to shut down, this just lets it stand in for a ParallelEvaluator
+        self.batch_game = None
+
+
+if __name__ == "__main__":
+    import time
+
+    from snake_game.benchmarks.memory import build_brain
+    from snake_game.neural_net import PopulationNet
+
+    NUM_BRAINS = 200
+    population_net = PopulationNet.from_nets([build_brain() for _ in range(NUM_BRAINS)])
+
+    for num_episodes in (1, 4, 8):
+        evaluator = MultiEpisodeEvaluator((400, 400), (10, 10), num_episodes=num_episodes, seed=0)
+        start = time.perf_counter()
+        fitness = evaluator.evaluate(population_net)
+        print("{} episodes: {:.2f}s, {} steps, best mean {:.1f}, best min {}".format(
+            num_episodes, time.perf_counter() - start, evaluator.total_steps, fitness.max(),
+            evaluator.stats["min"].max()))
@@ -1,12 +1,11 @@
-import pygame
-
-
 class Food:
+    __slots__ = ("food_dims", "pos")
 
     def __init__(self, pos, food_dims):
         self.food_dims = food_dims
         self.pos = pos
 
     def draw(self, screen):
-        pygame.draw.rect(screen, (128, 0, 0), pygame.Rect(*self.pos, *self.food_dims))
+        from snake_game import rendering
+        rendering.draw_food(screen, self)
 
@@ -2,23 +2,37 @@ from snake_game.snake import Snake
 from snake_game.food import Food
 
 from snake_game.helper_functions import random_square
+from snake_game.loop_detection import LoopDetector, loop_credit
 
-import pygame
+import random
+
+import numpy as np
 
 from snake_game.tick_updater import TickUpdater
 
 sign = lambda x: 1 if x > 0 else -1 if x < 0 else 0
 
 class Game(TickUpdater):
-    def __init__(self, snake_pos, snake_dims, food_pos, food_dims, screen_dims, tick_rate, life_time=200):
-        super().__init__(tick_rate)
+    __slots__ = ("snake", "food", "dims", "life_time", "ticks_since_eaten", "simulated_ticks", "loop_penalty",
+                 "loop_detector")
+
+    def __init__(self, snake_pos, snake_dims, food_pos, food_dims, screen_dims, tick_rate, life_time=200,
+                 realtime=True, loop_penalty=None):
+        super().__init__(tick_rate, realtime=realtime)
 
-        self.snake = Snake(snake_pos, snake_dims)
+        self.snake = Snake(snake_pos, snake_dims, screen_dims, hash_body=loop_penalty is not None)
         self.food = Food(food_pos, food_dims)
         self.dims = screen_dims
 
         self.life_time = life_time
         self.ticks_since_eaten = 0
+        # Ticks that were actually played out, unlike ticks_since_start this leaves out what a cut off loop is credited
+        self.simulated_ticks = 0
+
+        # With a penalty set, a snake that gets back into a state it has already been in is stuck circling until it
+        # starves, so it is cut off straight away instead
+        self.loop_penalty = loop_penalty
+        self.loop_detector = LoopDetector() if loop_penalty is not None else None
 
     @property
     def score(self):
@@ -30,12 +44,13 @@ class Game(TickUpdater):
 
     def eat(self, screen_dims):
         self.ticks_since_eaten = 0
+        if self.loop_detector is not None:
+            self.loop_detector.reset()
         self.snake.grow()
-        while self.food.pos in self.snake.tail_pieces:
-            self.food.pos = random_square(screen_dims[0] - self.food.food_dims[0],
-                                          screen_dims[1] - self.food.food_dims[1],
-                                          self.food.food_dims[0],
-                                          self.food.food_dims[1])
+        if self.snake.is_occupied(self.food.pos):
+            free_cells = self.snake.free_cells()
+            if len(free_cells):
+                self.food.pos = self.snake.cell_pos(int(free_cells[random.randrange(len(free_cells))]))
 
     def look_ahead_to_food(self, direction):
         looking_at = [self.snake.pos[0], self.snake.pos[1]]
@@ -119,23 +134,49 @@ class Game(TickUpdater):
             if self.ticks_since_eaten > self.life_time:
                 self.snake.die()
             if super().update():
+                self.simulated_ticks += 1
                 self.snake.move(screen_dims)
                 self.ticks_since_eaten += 1
                 if self.snake.pos == self.food.pos:
                     self.eat(screen_dims)
+                elif self.loop_detector is not None and self.snake.alive:
+                    self.check_for_loop()
                 return True
 
+    def check_for_loop(self):
+        # Food only moves when it is eaten, which restarts the search, so the snake's state is the whole game state
+        if self.loop_detector.seen(self.snake.state_hash()):
+            self.snake.die()
+            self.ticks_since_start += int(loop_credit(self.life_time, self.ticks_since_eaten, self.loop_penalty))
+
     def reset(self):
-        self.snake.pos = (self.dims[0] // 2, self.dims[1] // 2)
+        # Puts the game back exactly how a fresh copy starts, so games can be recycled between generations
+        self.snake.reset((self.dims[0] // 2, self.dims[1] // 2))
         self.food.pos = random_square(self.dims[0], self.dims[1], *self.food.food_dims)
-        self.snake.alive = True
         self.ticks_since_eaten = 0
-        self.snake.colour = (255, 255, 255)
-        self.snake.tail_pieces = [self.snake.pos]
+        self.ticks_since_start = 0
+        self.simulated_ticks = 0
+        self.time_elapsed_since_tick = 0
+        if self.loop_detector is not None:
+            self.loop_detector.reset()
+
+    def compact_state(self):
+        # Everything needed to restore the game in one small int array, the body goes last as packed tile indices
+        return np.array([*self.snake.pos, *self.snake.heading, *self.food.pos, self.snake.alive, self.snake.growth,
+                         self.ticks_since_eaten, self.ticks_since_start, *self.snake.body], dtype=np.int32)
+
+    def load_compact_state(self, state):
+        state = [int(value) for value in state]
+        self.food.pos = (state[4], state[5])
+        self.ticks_since_eaten, self.ticks_since_start = state[8], state[9]
+        self.snake.load_body((state[0], state[1]), (state[2], state[3]), state[10:], state[7], bool(state[6]))
+        if self.loop_detector is not None:
+            self.loop_detector.reset()
 
     def deep_copy(self):
         return Game(
-            self.snake.pos, self.snake.snake_dims, self.food.pos, self.food.food_dims, self.dims, self.tick_rate
+            self.snake.pos, self.snake.snake_dims, self.food.pos, self.food.food_dims, self.dims, self.tick_rate,
+            life_time=self.life_time, realtime=self.realtime, loop_penalty=self.loop_penalty
         )
 
     def fresh_deep_copy(self):
@@ -145,6 +186,8 @@ class Game(TickUpdater):
 
 
 if __name__ == "__main__":
+    import pygame
+
     SCREEN_WIDTH, SCREEN_HEIGHT = 400, 400
 
     pygame.init()
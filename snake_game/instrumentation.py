@@ -0,0 +1,153 @@
+import csv
+import json
+import time
+import tracemalloc
+from collections import defaultdict
+
+# One flat row per phase per generation, the generation row holds the wall time of the whole generation
+FIELDS = ["generation", "phase", "calls", "wall_time", "ticks", "forward_passes", "allocated_bytes"]
+
+
+class NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_PHASE = NullPhase()
+
+
+class Phase:
+    __slots__ = ("profiler", "name", "start", "memory_start", "outer_peak")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+        self.memory_start = 0
+        self.outer_peak = 0
+
+    def __enter__(self):
+        if self.profiler.track_allocations:
+            # The peak is reset to measure this phase, whatever an enclosing phase had reached so far is kept aside
+            # and handed back on the way out
+            memory, peak = tracemalloc.get_traced_memory()
+            self.outer_peak = max(peak, self.profiler.inner_peak)
+            self.profiler.inner_peak = 0
+            tracemalloc.reset_peak()
+            self.memory_start = memory
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        totals = self.profiler.totals[self.name]
+        totals["wall_time"] += time.perf_counter() - self.start
+        totals["calls"] += 1
+        if self.profiler.track_allocations:
+            # Highest the traced memory got above where the phase started, so temporaries it allocated and freed
+            # again count too
+            peak = max(tracemalloc.get_traced_memory()[1], self.profiler.inner_peak)
+            totals["allocated_bytes"] += max(peak - self.memory_start, 0)
+            self.profiler.inner_peak = max(self.outer_peak, peak)
+        return False
+
+
+class Profiler:
+    def __init__(self):
+        # Off by default, every hook then costs one attribute check
+        self.enabled = False
+        self.track_allocations = False
+        self.stream_path = None
+        # Peak memory reached inside nested phases, see Phase
+        self.inner_peak = 0
+        # Rows are only kept around when nothing is streaming them out, or when they are going to be exported
+        self.keep_rows = True
+
+        self.phases = {}
+        self.totals = defaultdict(lambda: defaultdict(float))
+        self.rows = []
+        self.generation_start = None
+
+    def enable(self, stream_path=None, track_allocations=False, keep_rows=None):
+        # stream_path gets a row appended per phase every generation, as CSV or as JSON lines depending on the suffix.
+        # keep_rows defaults to only holding rows in memory for export_csv and export_json when not streaming
+        self.enabled = True
+        self.stream_path = stream_path
+        self.track_allocations = track_allocations
+        self.keep_rows = stream_path is None if keep_rows is None else keep_rows
+        self.inner_peak = 0
+        if track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if stream_path is not None and stream_path.endswith(".csv"):
+            with open(stream_path, "w", newline="") as stream_file:
+                csv.writer(stream_file).writerow(FIELDS)
+        elif stream_path is not None:
+            open(stream_path, "w").close()
+        self.generation_start = time.perf_counter()
+
+    def disable(self):
+        self.enabled = False
+        if self.track_allocations:
+            tracemalloc.stop()
+            self.track_allocations = False
+
+    def phase(self, name):
+        if not self.enabled:
+            return NULL_PHASE
+        if name not in self.phases:
+            self.phases[name] = Phase(self, name)
+        return self.phases[name]
+
+    def count(self, phase, counter, amount=1):
+        if self.enabled:
+            self.totals[phase][counter] += amount
+
+    def end_generation(self, generation):
+        if not self.enabled:
+            return []
+        now = time.perf_counter()
+        rows = [self.row(generation, name, totals) for name, totals in sorted(self.totals.items())]
+        rows.append(self.row(generation, "generation", {"calls": 1, "wall_time": now - self.generation_start}))
+        self.totals.clear()
+        self.generation_start = now
+
+        if self.keep_rows:
+            self.rows += rows
+        if self.stream_path is not None:
+            self.append(self.stream_path, rows)
+        return rows
+
+    @staticmethod
+    def row(generation, phase, totals):
+        row = {"generation": generation, "phase": phase}
+        for field in FIELDS[2:]:
+            value = totals.get(field, 0)
+            row[field] = value if field == "wall_time" else int(value)
+        return row
+
+    @staticmethod
+    def append(path, rows):
+        with open(path, "a", newline="") as stream_file:
+            if path.endswith(".csv"):
+                csv.DictWriter(stream_file, FIELDS).writerows(rows)
+            else:
+                for row in rows:
+                    stream_file.write(json.dumps(row) + "\n")
+
+    def export_csv(self, path):
+        with open(path, "w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, FIELDS)
+            writer.writeheader()
+            writer.writerows(self.rows)
+
+    def export_json(self, path):
+        with open(path, "w") as json_file:
+            json.dump(self.rows, json_file, indent=2)
+
+
+# Shared by every hook, turn it on with profiler.enable()
+profiler = Profiler()
@@ -0,0 +1,134 @@
+import queue
+import random
+from multiprocessing import Process, Queue
+
+import numpy as np
+
+from snake_game.arena import Arena
+from snake_game.brains import build_snake_brain, derive_seed
+from snake_game.mutation import Mutator
+from snake_game.selection import tournament
+from snake_game.snake_brain import GameWithNet
+
+
+class IslandConfig:
+    def __init__(self, island_size, screen_dims, tile_dims, hidden_layers=(64, 64), num_outputs=4, life_time=200,
+                 tournament_size=2, mutation_rate=1 / 200, cross_over_prob=0.5, loop_penalty=None, seed=0):
+        self.island_size = island_size
+        self.screen_dims = tuple(screen_dims)
+        self.tile_dims = tuple(tile_dims)
+        self.hidden_layers = tuple(hidden_layers)
+        self.num_outputs = num_outputs
+        self.life_time = life_time
+        self.tournament_size = tournament_size
+        self.mutation_rate = mutation_rate
+        self.cross_over_prob = cross_over_prob
+        self.loop_penalty = loop_penalty
+        self.seed = seed
+
+    def build_brains(self):
+        game_config = (self.screen_dims, self.tile_dims, self.life_time, self.loop_penalty)
+        return [build_snake_brain(game_config, self.hidden_layers, self.num_outputs) for _ in range(self.island_size)]
+
+
+def run_island(island, config, num_generations, migration_interval, num_migrants, inbox, outbox, results):
+    seed = derive_seed(config.seed, island)
+    random.seed(seed)
+    np.random.seed(seed)
+    mutation_seed, selection_seed, arena_seed = np.random.SeedSequence(seed).spawn(3)
+    selection_rng = np.random.default_rng(selection_seed)
+    mutator = Mutator(config.mutation_rate, seed=mutation_seed)
+    arena = Arena(config.build_brains(), rng=np.random.default_rng(arena_seed))
+
+    best_params, best_score, history = None, -np.inf, []
+    for generation in range(num_generations):
+        GameWithNet.simulate_no_video(arena.snake_brains, *config.screen_dims, population_net=arena.population_net)
+        scores = np.array([snake_brain.game.score for snake_brain in arena.snake_brains], dtype=np.float64)
+
+        # Ring migration: copies of our best go to the next island and its best take the place of our worst, scores
+        # and all, so they are in this generation's tournaments
+        if num_migrants and (generation + 1) % migration_interval == 0 and generation + 1 < num_generations:
+            elites = np.argsort(-scores, kind="stable")[:num_migrants]
+            outbox.put((arena.params[elites].copy(), scores[elites].copy()))
+            migrant_params, migrant_scores = inbox.get()
+            worst = np.argsort(scores, kind="stable")[:len(migrant_scores)]
+            arena.params[worst] = migrant_params
+            scores[worst] = migrant_scores
+
+        generation_best = int(np.argmax(scores))
+        if scores[generation_best] > best_score:
+            best_params, best_score = arena.params[generation_best].copy(), scores[generation_best]
+        history.append(float(scores.max()))
+
+        if generation + 1 < num_generations:
+            parent_indices = tournament(scores, config.tournament_size, rng=selection_rng)
+            arena.next_generation(parent_indices, config.tournament_size, mutator, config.cross_over_prob)
+
+    results.put((island, best_params, best_score, history))
+
+
+class IslandModel:
+    def __init__(self, num_islands, config, migration_interval=5, num_migrants=2):
+        self.num_islands = num_islands
+        self.config = config
+        # Every migration_interval generations each island sends its num_migrants best to the next island round a ring
+        self.migration_interval = migration_interval
+        self.num_migrants = num_migrants
+
+        self.best_params, self.best_score = None, -np.inf
+        self.histories = [None] * num_islands
+
+    def run(self, num_generations):
+        inboxes = [Queue() for _ in range(self.num_islands)]
+        results = Queue()
+        processes = [Process(target=run_island,
+                             args=(island, self.config, num_generations, self.migration_interval, self.num_migrants,
+                                   inboxes[island], inboxes[(island + 1) % self.num_islands], results))
+                     for island in range(self.num_islands)]
+        for process in processes:
+            process.start()
+
+        # Drain the results before joining, a process can't exit while its queue still holds unread data
+        for _ in processes:
+            island, best_params, best_score, history = self.next_result(results, processes)
+            self.histories[island] = history
+            if best_score > self.best_score:
+                self.best_params, self.best_score = best_params, best_score
+        for process in processes:
+            process.join()
+            if process.exitcode != 0:
+                raise RuntimeError("An island exited with code {}".format(process.exitcode))
+        return self.best_params, self.best_score
+
+    @staticmethod
+    def next_result(results, processes):
+        # An island that dies would leave its neighbour waiting for migrants forever, so give up on the lot
+        while True:
+            try:
+                return results.get(timeout=1)
+            except queue.Empty:
+                for process in processes:
+                    if process.exitcode not in (None, 0):
+                        for other in processes:
+                            other.terminate()
+                        raise RuntimeError("An island exited with code {}".format(process.exitcode))
+
+    def best_brain(self):
+        snake_brain = self.config.build_brains()[0]
+        snake_brain.params[:] = self.best_params
+        return snake_brain
+
+
+if __name__ == "__main__":
+    import time
+
+    NUM_ISLANDS = 4
+    NUM_GENERATIONS = 20
+
+    config = IslandConfig(50, (400, 400), (10, 10), loop_penalty=0.0, seed=0)
+    model = IslandModel(NUM_ISLANDS, config, migration_interval=5, num_migrants=2)
+    start = time.perf_counter()
+    best_params, best_score = model.run(NUM_GENERATIONS)
+    print("{} islands in {:.2f}s, best score {}".format(NUM_ISLANDS, time.perf_counter() - start, best_score))
+    for island, history in enumerate(model.histories):
+        print("island {}: {}".format(island, history))
@@ -0,0 +1,102 @@
+import numpy as np
+
+# Keys are shared by every game on a board of the same size, they only have to be random, not secret
+_keys_by_board = {}
+
+
+class ZobristKeys:
+    __slots__ = ("columns", "links", "heads", "link_list", "head_list")
+
+    def __init__(self, board_dims, seed=0):
+        self.columns = board_dims[0]
+        num_cells = board_dims[0] * board_dims[1]
+        rng = np.random.default_rng([seed, *board_dims])
+        # links is keyed by a body piece and which way the next piece towards the head lies, in sensors.DIRECTIONS
+        # order, heads by the head's tile and its heading
+        self.links = rng.integers(0, np.iinfo(np.uint64).max, size=(num_cells, 4), dtype=np.uint64, endpoint=True)
+        self.heads = rng.integers(0, np.iinfo(np.uint64).max, size=(num_cells, 4), dtype=np.uint64, endpoint=True)
+        # Plain int copies for Snake, indexing numpy scalars one at a time is much slower
+        self.link_list = self.links.tolist()
+        self.head_list = self.heads.tolist()
+
+    def link_direction(self, cell, next_cell):
+        delta = next_cell - cell
+        if delta == -1:
+            return 0
+        if delta == -self.columns:
+            return 1
+        if delta == 1:
+            return 2
+        return 3
+
+    def link_directions(self, cells, next_cells):
+        deltas = next_cells - cells
+        return np.where(deltas == -1, 0, np.where(deltas == -self.columns, 1, np.where(deltas == 1, 2, 3)))
+
+    def link(self, cell, next_cell):
+        return self.link_list[cell][self.link_direction(cell, next_cell)]
+
+
+def zobrist_keys(board_dims):
+    board_dims = tuple(board_dims)
+    if board_dims not in _keys_by_board:
+        _keys_by_board[board_dims] = ZobristKeys(board_dims)
+    return _keys_by_board[board_dims]
+
+
+def remaining_ticks(life_time, ticks_since_eaten):
+    # A snake stuck in a loop never eats again, so it keeps moving until it starves and then takes one more tick to die
+    return life_time - ticks_since_eaten + 2
+
+
+def loop_credit(life_time, ticks_since_eaten, loop_penalty):
+    # With no penalty a cut off snake scores exactly what it would have by starving, a penalty of 1 gives it nothing
+    return np.rint((1 - loop_penalty) * remaining_ticks(life_time, ticks_since_eaten)).astype(np.int64)
+
+
+class LoopDetector:
+    __slots__ = ("saved", "power", "steps")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # Brent's algorithm: remember the state at every power of two steps and look for it to come round again
+        self.saved = None
+        self.power = 1
+        self.steps = 0
+
+    def seen(self, state_hash):
+        if state_hash == self.saved:
+            return True
+        self.steps += 1
+        if self.steps == self.power:
+            self.saved = state_hash
+            self.power *= 2
+            self.steps = 0
+        return False
+
+
+class BatchLoopDetector:
+    def __init__(self, num_games):
+        self.saved = np.zeros(num_games, dtype=np.uint64)
+        self.has_saved = np.zeros(num_games, dtype=bool)
+        self.power = np.ones(num_games, dtype=np.int64)
+        self.steps = np.zeros(num_games, dtype=np.int64)
+
+    def reset(self, games):
+        self.has_saved[games] = False
+        self.power[games] = 1
+        self.steps[games] = 0
+
+    def seen(self, games, state_hashes):
+        looping = self.has_saved[games] & (self.saved[games] == state_hashes)
+        games, state_hashes = games[~looping], state_hashes[~looping]
+        self.steps[games] += 1
+        saving = self.steps[games] == self.power[games]
+        games, state_hashes = games[saving], state_hashes[saving]
+        self.saved[games] = state_hashes
+        self.has_saved[games] = True
+        self.power[games] *= 2
+        self.steps[games] = 0
+        return looping
@@ -22,13 +22,13 @@ done = False
 food_pieces = [food.Food(random_square(screen.get_width(),
                                        screen.get_height(),
                                        10, 10), (10, 10)) for _ in range(1)]
-snake_test = snake.Snake((0, 0), (10, 10))
+snake_test = snake.Snake((0, 0), (10, 10), (SCREEN_WIDTH, SCREEN_HEIGHT))
 
 game_test = Game((50, 50), (10, 10), (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2), (10, 10),
                      (SCREEN_WIDTH, SCREEN_HEIGHT), 100)
 
 for _ in range(40):
-    snake_test.tail_pieces.append((-100, -100))
+    snake_test.grow()
 
 new_direction = None
 
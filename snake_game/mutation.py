@@ -0,0 +1,54 @@
+import numpy as np
+
+
+class Mutator:
+    def __init__(self, scale, loc=0, min_value=-1, max_value=1, mutation_prob=1.0, seed=None):
+        self.scale = scale
+        self.loc = loc
+        self.min_value = min_value
+        self.max_value = max_value
+        # Below one only that fraction of genes, picked independently, gets any noise
+        self.mutation_prob = mutation_prob
+        self.rng = np.random.default_rng(seed)
+
+        # Scratch space reused between calls as long as the shape doesn't change
+        self.noise = None
+        self.uniforms = None
+        self.mask = None
+
+    def buffers(self, size):
+        if self.noise is None or self.noise.shape[0] != size:
+            self.noise = np.empty(size)
+            self.uniforms = np.empty(size)
+            self.mask = np.empty(size, dtype=bool)
+        return self.noise, self.uniforms, self.mask
+
+    def fill_noise(self, noise):
+        self.rng.standard_normal(out=noise)
+        noise *= self.scale
+        if self.loc:
+            noise += self.loc
+        return noise
+
+    def mutate(self, params):
+        # params is a net's parameter vector or a whole (population, parameters) matrix, changed in place
+        flat_params = params.reshape(-1)
+        if not np.shares_memory(flat_params, params):
+            raise ValueError("Parameters need to be contiguous to be mutated in place!")
+        noise, uniforms, mask = self.buffers(flat_params.shape[0])
+
+        if self.mutation_prob >= 1:
+            flat_params += self.fill_noise(noise)
+        else:
+            self.rng.random(out=uniforms)
+            np.less(uniforms, self.mutation_prob, out=mask)
+            genes = np.flatnonzero(mask)
+            # Only the front of the noise buffer is needed, one draw per picked gene
+            flat_params[genes] += self.fill_noise(noise[:len(genes)])
+
+        np.clip(flat_params, self.min_value, self.max_value, out=flat_params)
+        return params
+
+    def mutate_net(self, net):
+        self.mutate(net.params)
+        return net
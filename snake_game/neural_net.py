@@ -13,6 +13,8 @@ class Layer:
     WEIGHTS = "weights"
     types = [BIAS, WEIGHTS]
 
+    __slots__ = ("array", "type")
+
     def __init__(self, array, type):
         self.array = array
         if type not in Layer.types:
@@ -24,8 +26,8 @@ class Layer:
         return self.array.shape
 
     def cap(self, min_value=-inf, max_value=inf):
-        self.array = np.maximum(self.array, min_value * np.ones(shape=self.array.shape))
-        self.array = np.minimum(self.array, max_value * np.ones(shape=self.array.shape))
+        # In place, the array may be a view into its net's parameter vector
+        np.clip(self.array, min_value, max_value, out=self.array)
 
     def forward_pass(self, inp):
         if self.type == Layer.WEIGHTS:
@@ -36,62 +38,63 @@ class Layer:
     def mutate_with_normal(self, loc=0, scale=1):
         self.array += np.random.normal(loc=loc, scale=scale, size=self.array.shape)
 
-    def cross_over(self, other, cross_over_indices):
+    def check_cross_over_compatible(self, other):
         if self.array.shape != other.array.shape:
-            raise ValueError("Layers need to be same shape")
+            raise ValueError("Layers need to be same shape!")
         elif self.type != other.type:
             raise ValueError("Arrays to be crossover-ed need to be same type!")
 
-        cross_over_indices = list(sorted(cross_over_indices, reverse=True))
-        first_array = np.empty(self.array.shape)
-        second_array = np.empty(other.array.shape)
-        rolling_index = 0
+    def cross_over_mask(self, other, mask):
+        # Wherever mask is set the children swap parents
+        self.check_cross_over_compatible(other)
+        first_array, second_array = Layer.cross_over_arrays(self.array, other.array, mask)
+        return Layer(first_array, self.type), Layer(second_array, other.type)
 
-        cross_over_choice = 0
-        indicies = cross_over_indices[0]
+    def cross_over(self, other, cross_over_indices):
+        return self.cross_over_mask(other, Layer.points_mask(self.shape, cross_over_indices))
 
-        for row_index in range(len(self.array)):
-            for column_index in range(len(self.array[row_index])):
-                if isinstance(indicies, list):
-                    indicies = first_array.shape[1] * indicies[0] + indicies[1]
+    def cross_over_index_multiple(self, other, cross_over_indices):
+        return self.cross_over(other, cross_over_indices)
 
-                if cross_over_indices and rolling_index >= indicies:
-                    cross_over_choice += 1
-                    indicies = cross_over_indices.pop()
+    def cross_over_index_single(self, other, cross_over_index):
+        return self.cross_over(other, [cross_over_index])
 
-                if cross_over_choice % 2 == 0:
-                    first_array[row_index][column_index] = self.array[row_index][column_index]
-                    second_array[row_index][column_index] = other.array[row_index][column_index]
+    def cross_over_random_points(self, other, num_points):
+        return self.cross_over_mask(other, Layer.random_points_mask((1,) + self.shape, num_points)[0])
 
-                else:
-                    first_array[row_index][column_index] = other.array[row_index][column_index]
-                    second_array[row_index][column_index] = self.array[row_index][column_index]
+    def cross_over_uniform_multiple(self, other, cross_over_prob):
+        return self.cross_over_mask(other, Layer.uniform_mask(self.shape, cross_over_prob))
 
-                rolling_index += 1
+    @staticmethod
+    def cross_over_arrays(first_array, second_array, mask):
+        return np.where(mask, second_array, first_array), np.where(mask, first_array, second_array)
 
-        return Layer(first_array, self.type), Layer(second_array, other.type)
+    @staticmethod
+    def uniform_mask(shape, cross_over_prob):
+        return np.random.uniform(low=0, high=1, size=shape) <= cross_over_prob
 
-    def cross_over_uniform_multiple(self, other, cross_over_prob):
-        if self.array.shape != other.array.shape:
-            raise ValueError("Layers need to be same shape!")
-        elif self.type != other.type:
-            raise ValueError("Arrays to be crossover-ed need to be same type!")
-        rand_array = np.random.uniform(low=0, high=1, size=self.shape)
-        return_array_self = np.zeros(self.array.shape)
-        return_array_other = np.zeros(self.array.shape)
-        for row_counter, (self_row, other_row, rand_row) in enumerate(zip(self.array, other.array, rand_array)):
-            for col_counter, (self_column, other_column, rand_col) in enumerate(zip(self_row, other_row, rand_row)):
-                if rand_col <= cross_over_prob:
-                    return_array_self[row_counter][col_counter] = other.array[row_counter][col_counter]
-                    return_array_other[row_counter][col_counter] = self.array[row_counter][col_counter]
-                else:
-                    return_array_self[row_counter][col_counter] = self.array[row_counter][col_counter]
-                    return_array_other[row_counter][col_counter] = other.array[row_counter][col_counter]
-
-        return Layer(return_array_self, self.type), Layer(return_array_other, other.type)
+    @staticmethod
+    def points_mask(shape, cross_over_indices):
+        # Indices are positions in the flattened array, or [row, column] pairs, and the parents swap at each one
+        size = int(np.prod(shape))
+        columns = shape[1] if len(shape) > 1 else 1
+        points = [columns * index[0] + index[1] if isinstance(index, (list, tuple)) else index
+                  for index in cross_over_indices]
+        toggles = np.zeros(size + 1, dtype=np.int64)
+        np.add.at(toggles, np.clip(points, 0, size), 1)
+        return (np.cumsum(toggles[:-1]) % 2 == 1).reshape(shape)
+
+    @staticmethod
+    def random_points_mask(shape, num_points):
+        # shape is (population, ...) and every member of the population gets its own random points
+        population, size = shape[0], int(np.prod(shape[1:]))
+        points = np.random.randint(0, size, size=(population, num_points))
+        toggles = np.zeros((population, size), dtype=np.int64)
+        np.add.at(toggles, (np.arange(population)[:, None], points), 1)
+        return (np.cumsum(toggles, axis=1) % 2 == 1).reshape(shape)
 
     def deep_copy(self):
-        return Layer(self.array, self.type)
+        return Layer(self.array.copy(), self.type)
 
     @staticmethod
     def array_randomise_normal(size, loc=0, scale=1):
@@ -106,11 +109,49 @@ class Layer:
 
 
 class NeuralNet:
-    def __init__(self, layers_list):
+    __slots__ = ("net", "params")
+
+    def __init__(self, layers_list, params=None):
+        # Every layer is a view into params, one contiguous vector holding the whole net.
+        # Passing params says the layers are already views into it, otherwise they get packed into a new one
         self.net = layers_list
+        if params is None:
+            self.pack()
+        else:
+            self.params = params
+
+    @staticmethod
+    def layers_from_params(params, topology):
+        layers, offset = [], 0
+        for shape, type in topology:
+            size = int(np.prod(shape))
+            layers.append(Layer(params[offset:offset + size].reshape(shape), type))
+            offset += size
+        if offset != len(params):
+            raise ValueError("Parameter vector doesn't match the topology!")
+        return layers
+
+    @staticmethod
+    def from_params(params, topology):
+        return NeuralNet(NeuralNet.layers_from_params(params, topology), params=params)
+
+    @property
+    def topology(self):
+        return [(layer.shape, layer.type) for layer in self.net]
+
+    def pack(self):
+        params = np.concatenate([layer.array.ravel() for layer in self.net]).astype(np.float64, copy=False) \
+            if self.net else np.empty(0)
+        self.bind(params)
+
+    def bind(self, params):
+        # Re-points every layer at params, which has to already hold this net's values or be about to
+        self.net = NeuralNet.layers_from_params(params, self.topology)
+        self.params = params
 
     def add_layer(self, layer):
         self.net.append(layer)
+        self.pack()
 
     def cap(self, min_values=None, max_values=None):
         if not min_values:
@@ -123,8 +164,7 @@ class NeuralNet:
             layer.cap(min_value=min_value, max_value=max_value)
 
     def cap_one_value(self, min_value, max_value):
-        for layer in self.net:
-            layer.cap(min_value=min_value, max_value=max_value)
+        np.clip(self.params, min_value, max_value, out=self.params)
 
     def gen_output(self, inp):
         for layer in self.net:
@@ -132,47 +172,39 @@ class NeuralNet:
         return inp
 
     def mutate_with_normal(self, loc=0, scale=1):
-        for layer in self.net:
-            layer.mutate_with_normal(loc=loc, scale=scale)
+        self.params += np.random.normal(loc=loc, scale=scale, size=self.params.shape)
+
+    def check_cross_over_compatible(self, other, num_per_layer_values):
+        if len(self.net) != len(other.net) or len(self.net) != num_per_layer_values:
+            raise ValueError("Net's need to be same length and need one crossover value per layer!")
+        for self_layer, other_layer in zip(self.net, other.net):
+            self_layer.check_cross_over_compatible(other_layer)
+
+    def cross_over_mask(self, other, mask):
+        first_params, second_params = Layer.cross_over_arrays(self.params, other.params, mask)
+        topology = self.topology
+        return NeuralNet.from_params(first_params, topology), NeuralNet.from_params(second_params, topology)
 
     def cross_over_index_multiple(self, other, cross_over_indices_list):
-        new_self_net = NeuralNet([])
-        new_other_net = NeuralNet([])
         # list of multiple crossover indicies
-        if len(self.net) != len(other.net) or len(self.net) != len(cross_over_indices_list):
-            raise ValueError("Net's need to be same length and crossover indicies needs to be same length")
-        for counter, (self_layer, other_layer) in enumerate(zip(self.net, other.net)):
-            if self_layer.type != other_layer.type:
-                raise ValueError("Arrays to be crossover-ed need to be same type!")
-            self_layer_to_add, other_layer_to_add = self_layer.cross_over_index_multiple(other_layer, cross_over_indices_list[counter])
-            new_self_net.add_layer(self_layer_to_add)
-            new_other_net.add_layer(other_layer_to_add)
-
-        return new_self_net, new_other_net
+        self.check_cross_over_compatible(other, len(cross_over_indices_list))
+        mask = np.concatenate([Layer.points_mask(layer.shape, cross_over_indices).ravel()
+                               for layer, cross_over_indices in zip(self.net, cross_over_indices_list)])
+        return self.cross_over_mask(other, mask)
 
     def cross_over_index_single(self, other, cross_over_index):
         return self.cross_over_index_multiple(other, [cross_over_index for _ in range(len(self.net))])
 
     def cross_over_uniform_multiple(self, other, cross_over_probs):
-        new_self_net = NeuralNet([])
-        new_other_net = NeuralNet([])
-        # list of multiple crossover indicies
-        if len(self.net) != len(other.net) or len(self.net) != len(cross_over_probs):
-            raise ValueError("Net's need to be same length!")
-        for counter, (self_layer, other_layer, cross_over_prob) in enumerate(zip(self.net, other.net, cross_over_probs)):
-            if self_layer.type != other_layer.type:
-                raise ValueError("Arrays to be crossover-ed need to be same type!")
-            self_layer_to_add, other_layer_to_add = self_layer.cross_over_uniform_multiple(other_layer, cross_over_prob)
-            new_self_net.add_layer(self_layer_to_add)
-            new_other_net.add_layer(other_layer_to_add)
-
-        return new_self_net, new_other_net
+        self.check_cross_over_compatible(other, len(cross_over_probs))
+        probs = np.repeat(cross_over_probs, [layer.array.size for layer in self.net])
+        return self.cross_over_mask(other, Layer.uniform_mask(self.params.shape, probs))
 
     def cross_over_uniform_single(self, other, cross_over_prob):
         return self.cross_over_uniform_multiple(other, [cross_over_prob for _ in range(len(self.net))])
 
     def deep_copy(self):
-        return NeuralNet([layer.deep_copy() for layer in self.net])
+        return NeuralNet.from_params(self.params.copy(), self.topology)
 
     def add_randomised_layer_weights(self, input_neurons, num_output_neurons, loc=0, scale=1):
         add_layer = Layer(Layer.array_randomise_normal((input_neurons, num_output_neurons), loc=loc, scale=scale),
@@ -196,6 +228,81 @@ class NeuralNet:
         return return_repr
 
 
+class PopulationNet:
+    __slots__ = ("params", "topology", "layers")
+
+    def __init__(self, params, topology):
+        # params holds one flat parameter vector per brain, and each entry of layers views one Layer of every
+        # brain as a (population, rows, columns) array
+        self.params = params
+        self.topology = topology
+        self.layers, offset = [], 0
+        for shape, _ in topology:
+            size = int(np.prod(shape))
+            self.layers.append(params[:, offset:offset + size].reshape((len(params),) + tuple(shape)))
+            offset += size
+
+    @staticmethod
+    def from_nets(nets):
+        topology = nets[0].topology
+        for net in nets[1:]:
+            if net.topology != topology:
+                raise ValueError("Nets need to share the same topology to be stacked!")
+        return PopulationNet(np.stack([net.params for net in nets]), topology)
+
+    @property
+    def types(self):
+        return [type for _, type in self.topology]
+
+    def __len__(self):
+        return len(self.params)
+
+    def gen_output(self, inp, rows=None):
+        # inp holds one row of inputs per brain, or a (population, games, inputs) block to play several games each.
+        # With rows only those brains are run and inp has one entry per row, in the same order
+        one_game = inp.ndim == 2
+        if one_game:
+            inp = inp[:, None, :]
+        for layer, type in zip(self.layers, self.types):
+            if rows is not None:
+                layer = layer[rows]
+            if type == Layer.WEIGHTS:
+                inp = np.matmul(inp, layer)
+            elif type == Layer.BIAS:
+                inp = inp + layer
+        return inp[:, 0, :] if one_game else inp
+
+    def mutate_with_normal(self, loc=0, scale=1):
+        self.params += np.random.normal(loc=loc, scale=scale, size=self.params.shape)
+
+    def cap_one_value(self, min_value, max_value):
+        np.clip(self.params, min_value, max_value, out=self.params)
+
+    def cross_over_mask(self, parent_pairs, mask_for_layer):
+        parent_pairs = np.asarray(parent_pairs)
+        first_parents, second_parents = self.params[parent_pairs[:, 0]], self.params[parent_pairs[:, 1]]
+        mask = np.concatenate([mask_for_layer((len(parent_pairs),) + tuple(shape)).reshape(len(parent_pairs), -1)
+                               for shape, _ in self.topology], axis=1)
+        first_children, second_children = Layer.cross_over_arrays(first_parents, second_parents, mask)
+        # Children of a pair sit next to each other, like in GameWithNet.cross_over_uniform_brains
+        children = np.empty((2 * len(parent_pairs), self.params.shape[1]), dtype=self.params.dtype)
+        children[0::2] = first_children
+        children[1::2] = second_children
+        return PopulationNet(children, list(self.topology))
+
+    def cross_over_uniform(self, parent_pairs, cross_over_prob):
+        return self.cross_over_mask(parent_pairs, lambda shape: Layer.uniform_mask(shape, cross_over_prob))
+
+    def cross_over_random_points(self, parent_pairs, num_points):
+        return self.cross_over_mask(parent_pairs, lambda shape: Layer.random_points_mask(shape, num_points))
+
+    def scatter(self, nets):
+        if len(nets) != len(self):
+            raise ValueError("Need exactly one net per brain in the population!")
+        for net, params in zip(nets, self.params):
+            net.params[:] = params
+
+
 if __name__ == "__main__":
     # test = Layer(np.random.uniform(0, 1, size=(2, 4)), Layer.WEIGHTS)
     # test_two = Layer(np.random.uniform(101, 105, size=(2, 4)), Layer.WEIGHTS)
@@ -0,0 +1,92 @@
+import random
+from multiprocessing import Pool, resource_tracker, shared_memory
+
+import numpy as np
+
+from snake_game.brains import build_snake_brain, derive_seed
+from snake_game.snake_brain import GameWithNet
+
+# Shared memory blocks a worker process has already attached to, by name
+_attached_blocks = {}
+
+
+def _attach(name):
+    if name not in _attached_blocks:
+        for stale_block in _attached_blocks.values():
+            stale_block.close()
+        _attached_blocks.clear()
+        _attached_blocks[name] = shared_memory.SharedMemory(name=name)
+    return _attached_blocks[name]
+
+
+def evaluate_chunk(block_name, num_brains, num_params, topology, start, stop, game_config, seed):
+    block = _attach(block_name)
+    weights = np.ndarray((num_brains, num_params), dtype=np.float64, buffer=block.buf)
+
+    random.seed(seed)
+    np.random.seed(seed)
+
+    snake_brains = [build_snake_brain(game_config, params=params, topology=topology) for params in weights[start:stop]]
+    GameWithNet.simulate_no_video(snake_brains, *game_config[0])
+    return ([snake_brain.game.score for snake_brain in snake_brains],
+            sum(snake_brain.game.simulated_ticks for snake_brain in snake_brains))
+
+
+class ParallelEvaluator:
+    def __init__(self, screen_dims, tile_dims, num_workers=None, life_time=200, seed=0, chunk_size=16,
+                 loop_penalty=None):
+        self.game_config = (tuple(screen_dims), tuple(tile_dims), life_time, loop_penalty)
+        self.seed = seed
+        # Chunks are seeded by their index, so results only depend on the chunk size and not on the worker count
+        self.chunk_size = chunk_size
+        self.generation = 0
+        self.total_steps = 0
+
+        # Workers have to share our resource tracker, otherwise each one unlinks the weights block when it exits
+        resource_tracker.ensure_running()
+        self.pool = Pool(num_workers)
+        self.block = None
+
+    def shared_weights(self, num_brains, num_params):
+        num_bytes = num_brains * num_params * np.dtype(np.float64).itemsize
+        if self.block is None or self.block.size < num_bytes:
+            self.release_block()
+            self.block = shared_memory.SharedMemory(create=True, size=num_bytes)
+        return np.ndarray((num_brains, num_params), dtype=np.float64, buffer=self.block.buf)
+
+    def evaluate(self, snake_brains):
+        topology = snake_brains[0].topology
+        num_params = len(snake_brains[0].params)
+        weights = self.shared_weights(len(snake_brains), num_params)
+        for row, snake_brain in zip(weights, snake_brains):
+            row[:] = snake_brain.params
+
+        tasks = []
+        for chunk_index, start in enumerate(range(0, len(snake_brains), self.chunk_size)):
+            stop = min(start + self.chunk_size, len(snake_brains))
+            tasks.append((self.block.name, len(snake_brains), num_params, topology, start, stop, self.game_config,
+                          derive_seed(self.seed, self.generation, chunk_index)))
+        self.generation += 1
+
+        scores = []
+        for chunk_scores, chunk_steps in self.pool.starmap(evaluate_chunk, tasks):
+            scores += chunk_scores
+            self.total_steps += chunk_steps
+        return np.array(scores)
+
+    def release_block(self):
+        if self.block is not None:
+            self.block.close()
+            self.block.unlink()
+            self.block = None
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        self.release_block()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,59 @@
+import heapq
+import itertools
+import os
+
+from snake_game.checkpoint import load_population, save_population
+
+
+class PopulationStore:
+    def __init__(self, population_size, hall_of_fame_size=10, history_dir=None):
+        self.population_size = population_size
+        self.hall_of_fame_size = hall_of_fame_size
+        # When set, every evaluated generation is written out here instead of being kept in memory
+        self.history_dir = history_dir
+        if history_dir is not None:
+            os.makedirs(history_dir, exist_ok=True)
+
+        self.current = []
+        self.generation = 0
+        # Min-heap of (score, insertion order, brain) so the weakest elite is always the one to go
+        self.hall_of_fame = []
+        self.insertion_counter = itertools.count()
+
+    def set_generation(self, brains):
+        # Crossover can hand back a spare brain, like the old all_games[-NUM_SNAKES:] only the newest ones are kept
+        self.current = list(brains)[-self.population_size:]
+
+    def record_scores(self, scores):
+        if len(scores) != len(self.current):
+            raise ValueError("Need exactly one score per brain in the current generation!")
+        for brain, score in zip(self.current, scores):
+            self.offer(brain, score)
+        if self.history_dir is not None:
+            self.spill(scores)
+        self.generation += 1
+
+    def offer(self, brain, score):
+        if len(self.hall_of_fame) < self.hall_of_fame_size:
+            heapq.heappush(self.hall_of_fame, (score, next(self.insertion_counter), brain.deep_copy()))
+        elif score > self.hall_of_fame[0][0]:
+            heapq.heapreplace(self.hall_of_fame, (score, next(self.insertion_counter), brain.deep_copy()))
+
+    def best(self):
+        if not self.hall_of_fame:
+            return None, 0
+        score, _, brain = max(self.hall_of_fame, key=lambda entry: entry[:2])
+        return brain, score
+
+    def elites(self):
+        return [(brain, score) for score, _, brain in sorted(self.hall_of_fame, key=lambda entry: entry[:2],
+                                                               reverse=True)]
+
+    def history_path(self, generation):
+        return os.path.join(self.history_dir, "generation_{:06d}.snet".format(generation))
+
+    def spill(self, scores):
+        save_population(self.history_path(self.generation), self.current, scores=scores)
+
+    def load_history(self, generation):
+        return load_population(self.history_path(generation))
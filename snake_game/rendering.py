@@ -0,0 +1,23 @@
+import pygame
+
+# Everything that needs pygame lives here, the game rules only import this once something is actually drawn
+
+FOOD_COLOUR = (128, 0, 0)
+
+
+def open_window(width, height):
+    pygame.init()
+    return pygame.display.set_mode((width, height))
+
+
+def clock():
+    return pygame.time.Clock()
+
+
+def draw_snake(screen, snake):
+    for cell in snake.body:
+        pygame.draw.rect(screen, snake.colour, pygame.Rect(*snake.cell_pos(cell), *snake.snake_dims))
+
+
+def draw_food(screen, food):
+    pygame.draw.rect(screen, FOOD_COLOUR, pygame.Rect(*food.pos, *food.food_dims))
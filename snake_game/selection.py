@@ -0,0 +1,44 @@
+import numpy as np
+
+# Every selection scheme takes a fitness vector and returns parent indices into it
+
+
+def tournament(fitness, tournament_size, num_selected=None, rng=None):
+    # Shuffle everyone into groups of tournament_size and keep the best of each group, reshuffling for more rounds
+    rng = np.random.default_rng() if rng is None else rng
+    fitness = np.asarray(fitness)
+    if not 1 <= tournament_size <= len(fitness):
+        raise ValueError("Tournament size must be between 1 and the number of brains!")
+    groups_per_round = len(fitness) // tournament_size
+    num_selected = groups_per_round if num_selected is None else num_selected
+    num_rounds = -(-num_selected // groups_per_round)
+
+    groups = np.concatenate([rng.permutation(len(fitness))[:groups_per_round * tournament_size]
+                             for _ in range(num_rounds)]).reshape(-1, tournament_size)[:num_selected]
+    return groups[np.arange(len(groups)), fitness[groups].argmax(axis=1)]
+
+
+def truncation(fitness, num_selected):
+    return np.argsort(-np.asarray(fitness), kind="stable")[:num_selected]
+
+
+def rank_based(fitness, num_selected, selection_pressure=1.5, rng=None):
+    # Linear ranking, selection_pressure is how many times the expected picks of the average the best one gets
+    rng = np.random.default_rng() if rng is None else rng
+    num_brains = len(fitness)
+    if num_brains == 1:
+        return np.zeros(num_selected, dtype=np.int64)
+    ranks = np.empty(num_brains)
+    ranks[np.argsort(fitness, kind="stable")] = np.arange(num_brains)
+    probs = (2 - selection_pressure) / num_brains \
+        + 2 * ranks * (selection_pressure - 1) / (num_brains * (num_brains - 1))
+    return rng.choice(num_brains, size=num_selected, p=probs)
+
+
+def fitness_proportional(fitness, num_selected, rng=None):
+    rng = np.random.default_rng() if rng is None else rng
+    weights = np.asarray(fitness, dtype=np.float64)
+    weights = weights - min(weights.min(), 0)
+    total = weights.sum()
+    probs = weights / total if total > 0 else None
+    return rng.choice(len(weights), size=num_selected, p=probs)
@@ -0,0 +1,105 @@
+import numpy as np
+
+# Same order GameWithNet feeds them to the net: Snake.LEFT, Snake.UP, Snake.RIGHT, Snake.DOWN
+DIRECTIONS = ((-1, 0), (0, -1), (1, 0), (0, 1))
+
+# Shared by every snake on a board of the same size
+_column_masks = {}
+
+
+def column_mask(board_dims):
+    # A bit at the start of every row, shifting an occupancy bitset right by a column and masking leaves that column
+    if board_dims not in _column_masks:
+        _column_masks[board_dims] = sum(1 << (row * board_dims[0]) for row in range(board_dims[1]))
+    return _column_masks[board_dims]
+
+
+def distances_to_death(snake, screen_dims):
+    # Pixel distances to the nearest wall or body piece in every direction, read straight off the occupancy bitset
+    x, y = snake.pos
+    distances = [x, y, screen_dims[0] - x, screen_dims[1] - y]
+
+    cell = snake.cell(snake.pos)
+    if cell is None:
+        return distances
+
+    columns = snake.board_dims[0]
+    column, row = cell % columns, cell // columns
+    width, height = snake.snake_dims
+    occupancy = snake.occupancy
+
+    # Highest set bit below the head is the nearest piece before it, lowest set bit above the head the nearest after
+    row_bits = occupancy >> (row * columns) & ((1 << columns) - 1)
+    left = row_bits & ((1 << column) - 1)
+    if left:
+        distances[0] = min(distances[0], (column - left.bit_length() + 1) * width)
+    right = row_bits >> (column + 1)
+    if right:
+        distances[2] = min(distances[2], (right & -right).bit_length() * width)
+
+    column_bits = occupancy >> column & column_mask(snake.board_dims)
+    up = column_bits & ((1 << (row * columns)) - 1)
+    if up:
+        distances[1] = min(distances[1], (row - (up.bit_length() - 1) // columns) * height)
+    down = column_bits >> ((row + 1) * columns)
+    if down:
+        distances[3] = min(distances[3], ((down & -down).bit_length() - 1) // columns * height + height)
+
+    return distances
+
+
+def inverse_distances(distances):
+    return np.divide(1, distances, out=np.zeros(np.shape(distances)), where=np.asarray(distances) != 0)
+
+
+def batch_distances_to_death(batch_game, games=None):
+    # games picks the rows to sense, by default every game, dead ones included
+    games = np.arange(batch_game.num_games) if games is None else np.asarray(games)
+    columns, rows = batch_game.board_dims
+    width, height = batch_game.tile_dims
+    xs, ys = batch_game.heads[games, 0], batch_game.heads[games, 1]
+    pixel_xs, pixel_ys = xs * width, ys * height
+    distances = np.stack([pixel_xs, pixel_ys, batch_game.screen_dims[0] - pixel_xs,
+                          batch_game.screen_dims[1] - pixel_ys], axis=1)
+
+    on_board = np.flatnonzero((xs >= 0) & (xs < columns) & (ys >= 0) & (ys < rows))
+    xs, ys = xs[on_board], ys[on_board]
+    grid = batch_game.occupancy.reshape(batch_game.num_games, rows, columns)
+    row_occupied = grid[games[on_board], ys, :] != 0
+    column_occupied = grid[games[on_board], :, xs] != 0
+
+    # Nearest piece before the head is the last occupied tile in front of it, after the head it is the first
+    before = row_occupied & (np.arange(columns) < xs[:, None])
+    nearest = columns - 1 - before[:, ::-1].argmax(axis=1)
+    body_distances = np.where(before.any(axis=1), (xs - nearest) * width, distances[on_board, 0])
+    distances[on_board, 0] = np.minimum(distances[on_board, 0], body_distances)
+
+    before = column_occupied & (np.arange(rows) < ys[:, None])
+    nearest = rows - 1 - before[:, ::-1].argmax(axis=1)
+    body_distances = np.where(before.any(axis=1), (ys - nearest) * height, distances[on_board, 1])
+    distances[on_board, 1] = np.minimum(distances[on_board, 1], body_distances)
+
+    after = row_occupied & (np.arange(columns) > xs[:, None])
+    nearest = after.argmax(axis=1)
+    body_distances = np.where(after.any(axis=1), (nearest - xs) * width, distances[on_board, 2])
+    distances[on_board, 2] = np.minimum(distances[on_board, 2], body_distances)
+
+    after = column_occupied & (np.arange(rows) > ys[:, None])
+    nearest = after.argmax(axis=1)
+    body_distances = np.where(after.any(axis=1), (nearest - ys) * height, distances[on_board, 3])
+    distances[on_board, 3] = np.minimum(distances[on_board, 3], body_distances)
+
+    return distances
+
+
+def batch_inputs(batch_game, games=None):
+    # One row per game in games, laid out exactly like GameWithNet.gen_inputs
+    games = np.arange(batch_game.num_games) if games is None else np.asarray(games)
+    heads, food = batch_game.heads[games], batch_game.food[games]
+    return np.column_stack([
+        100 * (heads[:, 1] <= food[:, 1]),
+        100 * (heads[:, 1] >= food[:, 1]),
+        100 * (heads[:, 0] <= food[:, 0]),
+        100 * (heads[:, 0] >= food[:, 0]),
+        200 * inverse_distances(batch_distances_to_death(batch_game, games))
+    ])
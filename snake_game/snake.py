@@ -1,7 +1,10 @@
-import pygame
-
 import math
 
+import numpy as np
+
+from snake_game.loop_detection import zobrist_keys
+from snake_game.sensors import DIRECTIONS, distances_to_death
+
 sign = lambda x: 1 if x > 0 else -1 if x < 0 else 0
 
 
@@ -11,23 +14,69 @@ class Snake:
     RIGHT = (1, 0)
     LEFT = (-1, 0)
 
-    def __init__(self, pos, snake_dims):
+    __slots__ = ("snake_dims", "heading", "board_dims", "occupancy", "pos", "alive", "origin", "body", "growth",
+                 "colour", "keys", "body_hash")
+
+    def __init__(self, pos, snake_dims, screen_dims, hash_body=False):
         self.snake_dims = snake_dims
+
+        # One bit per tile in a plain int, bit y * columns + x is set while a tail piece sits on it
+        self.board_dims = (screen_dims[0] // snake_dims[0], screen_dims[1] // snake_dims[1])
+        self.occupancy = 0
+        # Packed tile indices from head to tail, growth counts pieces that have been eaten but not grown in yet. A list
+        # costs a few bytes a piece where a deque starts at a whole block, and snakes are short enough that shifting it
+        # for a new head is cheap
+        self.body = []
+        # XOR of a key for every link between neighbouring body pieces, kept up to date as the snake moves. Only loop
+        # detection reads it, so without hash_body there are no keys and moving skips the XORs
+        self.keys = zobrist_keys(self.board_dims) if hash_body else None
+
+        self.reset(pos)
+
+    def reset(self, pos):
+        # Everything is cleared in place so a snake can be reused for game after game
         self.pos = pos
         self.heading = (1, 0)
-
         self.alive = True
-
-        self.tail_pieces = [pos]
+        # Tiles are laid out from wherever the snake starts, so an unaligned start still maps onto whole cells
+        self.origin = (pos[0] % self.snake_dims[0], pos[1] % self.snake_dims[1])
+        self.occupancy = 0
+        self.body.clear()
+        self.body_hash = 0
+        self.growth = 0
+        if self.cell(pos) is None:
+            # Games copied from a dead snake can start off the board, that piece just gets replaced on the first move
+            self.growth = 1
+        else:
+            self.occupy(pos)
 
         self.colour = (255, 255, 255)
 
+    def load_body(self, pos, heading, cells, growth, alive):
+        self.reset(pos)
+        self.heading = heading
+        self.body = list(cells)
+        self.growth = growth
+        self.occupancy = 0
+        for cell in self.body:
+            self.occupancy |= 1 << cell
+        self.body_hash = 0
+        if self.keys is not None:
+            for piece in range(1, len(self.body)):
+                self.body_hash ^= self.keys.link(self.body[piece], self.body[piece - 1])
+        if not alive:
+            self.die()
+
+    @property
+    def tail_pieces(self):
+        return [self.cell_pos(cell) for cell in self.body]
+
     def __len__(self):
-        return len(self.tail_pieces)
+        return len(self.body) + self.growth
 
     def draw(self, screen):
-        for tail_piece in self.tail_pieces:
-            pygame.draw.rect(screen, self.colour, pygame.Rect(*tail_piece, *self.snake_dims))
+        from snake_game import rendering
+        rendering.draw_snake(screen, self)
 
     def move(self, screen_dims):
         if self.alive:
@@ -38,12 +87,54 @@ class Snake:
                 self.die()
                 return
 
-            self.tail_pieces.pop()
-            last_tail_piece = self.pos
-            self.tail_pieces.insert(0, last_tail_piece)
+            old_head = self.body[0] if self.body else None
+            self.occupy(self.pos)
+            if old_head is not None and self.keys is not None:
+                self.body_hash ^= self.keys.link(old_head, self.body[0])
+            # The new head can never be on the tail, so the tail can go after it without clashing
+            if self.growth:
+                self.growth -= 1
+            else:
+                tail = self.body.pop()
+                self.occupancy ^= 1 << tail
+                if self.keys is not None:
+                    self.body_hash ^= self.keys.link(tail, self.body[-1])
+
+    def state_hash(self):
+        return self.body_hash ^ self.keys.head_list[self.body[0]][DIRECTIONS.index(self.heading)]
+
+    def cell(self, pos):
+        column = (pos[0] - self.origin[0]) // self.snake_dims[0]
+        row = (pos[1] - self.origin[1]) // self.snake_dims[1]
+        if 0 <= column < self.board_dims[0] and 0 <= row < self.board_dims[1]:
+            return row * self.board_dims[0] + column
+        return None
+
+    def cell_pos(self, cell):
+        return ((cell % self.board_dims[0]) * self.snake_dims[0] + self.origin[0],
+                (cell // self.board_dims[0]) * self.snake_dims[1] + self.origin[1])
+
+    def occupy(self, pos):
+        cell = self.cell(pos)
+        self.body.insert(0, cell)
+        self.occupancy |= 1 << cell
+
+    def is_occupied(self, pos):
+        cell = self.cell(pos)
+        return cell is not None and self.occupancy >> cell & 1 == 1
+
+    def occupancy_grid(self):
+        # The bitset unpacked to one uint8 per tile, the same layout as a row of BatchGame.occupancy
+        num_cells = self.board_dims[0] * self.board_dims[1]
+        packed = np.frombuffer(self.occupancy.to_bytes((num_cells + 7) // 8, "little"), dtype=np.uint8)
+        return np.unpackbits(packed, count=num_cells, bitorder="little")
+
+    def free_cells(self):
+        return np.flatnonzero(self.occupancy_grid() == 0)
 
     def will_die(self, screen_dims):
-        if self.pos in self.tail_pieces[1:]:
+        # The old head is the only piece the new head can never be on, so this matches checking the rest of the body
+        if self.is_occupied(self.pos):
             return True
         if self.pos[0] < 0 or self.pos[0] > screen_dims[0] - self.snake_dims[0] \
                 or self.pos[1] < 0 or self.pos[1] > screen_dims[1] - self.snake_dims[1]:
@@ -56,7 +147,7 @@ class Snake:
         self.colour = (128, 128, 128)
 
     def grow(self):
-        self.tail_pieces.append((-100, -100))
+        self.growth += 1
 
     def change_heading(self, direction):
         if direction == Snake.RIGHT and self.heading != Snake.LEFT:
@@ -106,7 +197,7 @@ class Snake:
         looking_at = [self.pos[0], self.pos[1]]
         while True:
             looking_at = [looking_at[0] + self.snake_dims[0] * direction[0], looking_at[1] + self.snake_dims[1] * direction[1]]
-            if looking_at in self.tail_pieces:
+            if self.is_occupied(looking_at):
                 break
 
             if looking_at[0] >= screen_dims[0] \
@@ -123,20 +214,7 @@ class Snake:
         return [1 / look_ahead[0], 1 / look_ahead[1]]
 
     def distance_to_death(self, screen_dims, heading):
-        dist_to_death = None
-        if heading == Snake.RIGHT:
-            dist_to_death = screen_dims[0] - self.pos[0]
-        elif heading == Snake.LEFT:
-            dist_to_death = self.pos[0]
-        elif heading == Snake.UP:
-            dist_to_death = self.pos[1]
-        elif heading == Snake.DOWN:
-            dist_to_death = screen_dims[1] - self.pos[1]
-
-        for tail_piece in self.tail_pieces[1:]:
-            dist_to_death = min(dist_to_death, self.dist_to_tail_piece(tail_piece))
-
-        return dist_to_death
+        return distances_to_death(self, screen_dims)[DIRECTIONS.index(heading)]
 
     def distance_to_death_inverse(self, screen_dims, heading):
         dist = self.distance_to_death(screen_dims, heading)
@@ -163,12 +241,14 @@ class Snake:
 
 
 if __name__ == "__main__":
+    import pygame
+
     SCREEN_WIDTH, SCREEN_HEIGHT = 400, 400
 
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 
-    test_snake = Snake((0, 0), (10, 10))
+    test_snake = Snake((0, 0), (10, 10), (SCREEN_WIDTH, SCREEN_HEIGHT))
     done = False
     while not done:
         for event in pygame.event.get():
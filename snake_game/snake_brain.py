@@ -1,11 +1,13 @@
 import random
 
 import numpy as np
-import pygame
 
-from snake_game.game_state import Game
+from snake_game.instrumentation import profiler
 from snake_game.snake import Snake
-from snake_game.neural_net import NeuralNet
+from snake_game.neural_net import NeuralNet, PopulationNet
+from snake_game.selection import tournament
+from snake_game.sensors import distances_to_death, inverse_distances
+from snake_game.viewer import Snapshot
 
 
 class GameWithNet(NeuralNet):
@@ -16,10 +18,12 @@ class GameWithNet(NeuralNet):
     regular_tick_speed = 1
     showing_only_best = False
 
-    def __init__(self, game, layers_list):
+    __slots__ = ("game", "snake_dims")
+
+    def __init__(self, game, layers_list, params=None):
         self.game = game
         self.snake_dims = self.game.snake.snake_dims
-        super().__init__(layers_list)
+        super().__init__(layers_list, params=params)
 
     def gen_inputs(self):
         # TODO: Fix this, maybe get a proper distance to death, as in, find the shortest distance to death based off of all the possible headings
@@ -29,16 +33,15 @@ class GameWithNet(NeuralNet):
 
 
         dir_to_food_normalised = self.game.food_direction_normalised()
+        inverse_distances_to_death = inverse_distances(distances_to_death(self.game.snake, self.game.dims))
         return_array = np.array([
             100 * self.game.is_food_up(),
             100 * self.game.is_food_down(),
             100 * self.game.is_food_right(),
             100 * self.game.is_food_left(),
             # 100 * dir_to_food_normalised[0], 100 * dir_to_food_normalised[1],
-            200 * self.game.snake.distance_to_death_inverse(self.game.dims, Snake.LEFT),
-            200 * self.game.snake.distance_to_death_inverse(self.game.dims, Snake.UP),
-            200 * self.game.snake.distance_to_death_inverse(self.game.dims, Snake.RIGHT),
-            200 * self.game.snake.distance_to_death_inverse(self.game.dims, Snake.DOWN)
+            # Snake.LEFT, Snake.UP, Snake.RIGHT, Snake.DOWN
+            *(200 * inverse_distances_to_death)
         ])
 
         if return_array.shape[0] != GameWithNet.INPUT_NEURONS:
@@ -53,7 +56,9 @@ class GameWithNet(NeuralNet):
         return outputs.argmax()
 
     def update(self, screen_dims):
-        option = self.evaluate()
+        self.apply_option(self.evaluate(), screen_dims)
+
+    def apply_option(self, option, screen_dims):
         if option == 0:
             self.game.snake.change_heading(Snake.UP)
         elif option == 1:
@@ -62,7 +67,7 @@ class GameWithNet(NeuralNet):
             self.game.snake.change_heading(Snake.RIGHT)
         elif option == 3:
             self.game.snake.change_heading(Snake.LEFT)
-        self.game.update(screen_dims)
+        return self.game.update(screen_dims)
 
     def add_randomised_layer_snake_weights(self, num_output_neurons, loc=0, scale=1.0):
         input_neurons = GameWithNet.INPUT_NEURONS if not self.net else self.net[-1].shape[1]
@@ -74,8 +79,12 @@ class GameWithNet(NeuralNet):
 
     @staticmethod
     def simulate_with_video(snake_brains, screen_width, screen_height, wait_til_close, print_inputs=False):
-        pygame.init()
-        screen = pygame.display.set_mode((screen_width, screen_height))
+        import pygame
+        from snake_game import rendering
+
+        screen = rendering.open_window(screen_width, screen_height)
+        for snake_brain in snake_brains:
+            snake_brain.game.set_realtime(True)
 
         done = False
         one_alive = True
@@ -108,41 +117,65 @@ class GameWithNet(NeuralNet):
             for snake_brain in snake_brains:
                 one_alive = one_alive or snake_brain.game.snake.alive
                 if not GameWithNet.paused:
-                    snake_brain.update([screen_width, screen_height])
-
-                if GameWithNet.showing_only_best and snake_brain == best_snake:
-                    snake_brain.draw(screen)
-                elif not GameWithNet.showing_only_best:
-                    snake_brain.draw(screen)
-
-
-            pygame.display.flip()
+                    # Same as snake_brain.update, split up so each part can be timed
+                    with profiler.phase("sensors"):
+                        inputs = snake_brain.gen_inputs()
+                    with profiler.phase("inference"):
+                        option = snake_brain.gen_output(inputs).argmax()
+                    profiler.count("inference", "forward_passes")
+                    with profiler.phase("physics"):
+                        if snake_brain.apply_option(option, [screen_width, screen_height]):
+                            profiler.count("physics", "ticks")
+
+                with profiler.phase("rendering"):
+                    if GameWithNet.showing_only_best and snake_brain == best_snake:
+                        snake_brain.draw(screen)
+                    elif not GameWithNet.showing_only_best:
+                        snake_brain.draw(screen)
+
+
+            with profiler.phase("rendering"):
+                pygame.display.flip()
 
         return snake_brains
 
     @staticmethod
-    def simulate_no_video(snake_brains, screen_width, screen_height):
-        while True in [snake_brain.game.snake.alive for snake_brain in snake_brains]:
-            for snake_brain in snake_brains:
-                snake_brain.update([screen_width, screen_height])
+    def simulate_no_video(snake_brains, screen_width, screen_height, population_net=None, viewer=None):
+        for snake_brain in snake_brains:
+            snake_brain.game.set_realtime(False)
+
+        # An Arena already has every brain stacked, anything else gets stacked here
+        if population_net is None:
+            population_net = PopulationNet.from_nets(snake_brains)
+        inputs = np.zeros((len(snake_brains), GameWithNet.INPUT_NEURONS))
+        live = [counter for counter, snake_brain in enumerate(snake_brains) if snake_brain.game.snake.alive]
+        while live:
+            # Only live snakes are sensed and run through the net, the weights of the rest are never touched
+            live_inputs = inputs[:len(live)]
+            with profiler.phase("sensors"):
+                for slot, counter in enumerate(live):
+                    live_inputs[slot] = snake_brains[counter].gen_inputs()
+            with profiler.phase("inference"):
+                rows = None if len(live) == len(snake_brains) else live
+                options = population_net.gen_output(live_inputs, rows=rows).argmax(axis=1)
+            profiler.count("inference", "forward_passes", len(live))
+            with profiler.phase("physics"):
+                for counter, option in zip(live, options):
+                    snake_brains[counter].apply_option(option, [screen_width, screen_height])
+                ticks = len(live)
+            profiler.count("physics", "ticks", ticks)
+            # A viewer draws in its own process, this only hands it the board about once a frame
+            if viewer is not None and viewer.due():
+                viewer.publish(Snapshot.from_games([snake_brain.game for snake_brain in snake_brains]))
+            live = [counter for counter in live if snake_brains[counter].game.snake.alive]
 
         return snake_brains
 
     @staticmethod
-    def tournament_snake_brains(games_with_nets, num_selected):
-        best_brains = []
-        brain_indicies = list(range(len(games_with_nets)))
-
-        while brain_indicies:
-            brain_indicies_to_fight = []
-            for _ in range(num_selected):
-                brain_indicies_to_fight.append(brain_indicies.pop(random.randint(0, len(brain_indicies) - 1)))
-            brain_fighting_scores = [games_with_nets[index].game.score for index in brain_indicies_to_fight]
-            best_brains.append(
-                games_with_nets[brain_indicies_to_fight[brain_fighting_scores.index(max(brain_fighting_scores))]]
-            )
-
-        return best_brains
+    def tournament_snake_brains(games_with_nets, num_selected, scores=None, rng=None):
+        if scores is None:
+            scores = [game_with_net.game.score for game_with_net in games_with_nets]
+        return [games_with_nets[index] for index in tournament(scores, num_selected, rng=rng)]
 
     @staticmethod
     def cross_over_index_brains(games, cross_over_index):
@@ -162,7 +195,8 @@ class GameWithNet(NeuralNet):
 
     def cross_over_uniform_single(self, other, cross_over_prob):
         net_one, net_two = super().cross_over_uniform_single(other, cross_over_prob)
-        return GameWithNet(self.game.deep_copy(), net_one.net), GameWithNet(other.game.deep_copy(), net_two.net)
+        return GameWithNet(self.game.deep_copy(), net_one.net, params=net_one.params), \
+            GameWithNet(other.game.deep_copy(), net_two.net, params=net_two.params)
 
     @staticmethod
     def cross_over_uniform_brains(games, prob):
@@ -183,11 +217,13 @@ class GameWithNet(NeuralNet):
 
     def fresh_deep_copy(self):
         game = self.game.fresh_deep_copy()
-        return GameWithNet(game, [layer.deep_copy() for layer in self.net])
+        net = NeuralNet.deep_copy(self)
+        return GameWithNet(game, net.net, params=net.params)
 
     def deep_copy(self):
         game = self.game.deep_copy()
-        return GameWithNet(game, [layer.deep_copy() for layer in self.net])
+        net = NeuralNet.deep_copy(self)
+        return GameWithNet(game, net.net, params=net.params)
 
     def __str__(self):
         return_str = ""
@@ -200,67 +236,7 @@ class GameWithNet(NeuralNet):
 
 
 if __name__ == "__main__":
-    SCREEN_WIDTH, SCREEN_HEIGHT = 400, 400
-    tile_width, tile_height = 10, 10
-    snake_starting_pos = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
-    food_starting_pos = (50, 50)
-    TICK_RATE = GameWithNet.regular_tick_speed
-
-    NUM_SNAKES = 200
-    NUM_GENERATIONS = 50
-
-    TOURNAMENT_COUNT = 2
-
-    MUTATION_RATE = 1 / 200
-    CROSS_OVER_RATE = 0.5
-
-    all_games = []
-    for snake_counter in range(NUM_SNAKES):
-        game_counter = Game(snake_starting_pos,
-                            (tile_width, tile_height),
-                            food_starting_pos,
-                            (tile_width, tile_height),
-                            (SCREEN_WIDTH, SCREEN_HEIGHT),
-                            TICK_RATE)
-
-        game_with_net = GameWithNet(game_counter, layers_list=[])
-        game_with_net.add_randomised_layer_snake_weights(64, loc=0, scale=1 / 25)
-        game_with_net.add_randomised_layer_snake_bias(loc=0, scale=1 / 25)
-        game_with_net.add_randomised_layer_snake_weights(64, loc=0, scale=1 / 25)
-        game_with_net.add_randomised_layer_snake_bias(loc=0, scale=1 / 25)
-        game_with_net.add_randomised_layer_snake_weights(4, loc=0, scale=1 / 25)
-        game_with_net.add_randomised_layer_snake_bias(loc=0, scale=1 / 25)
-        game_with_net.game.reset()
-
-        all_games.append(game_with_net)
-
-    best_snake, best_snake_score = None, 0
-
-    for gen_counter in range(NUM_GENERATIONS):
-        print("PERFORMING GENERATION {} / {}".format(gen_counter + 1, NUM_GENERATIONS))
-        curr_games = all_games[-NUM_SNAKES:]
-        GameWithNet.simulate_with_video(curr_games, 400, 400, False)
-
-        curr_games = GameWithNet.tournament_snake_brains(curr_games, TOURNAMENT_COUNT)
-        new_games_to_play = []
-
-        for game in curr_games:
-            if game.game.score >= best_snake_score:
-                best_snake, best_snake_score = game.deep_copy(), game.game.score
-            for _ in range(TOURNAMENT_COUNT):
-                new_game_capped_one = game.deep_copy()
-                new_game_capped_one.game.reset()
-                new_game_capped_one.mutate_with_normal(loc=0, scale=MUTATION_RATE)
-                new_game_capped_one.cap_one_value(-1, 1)
-
-                new_games_to_play += [new_game_capped_one]
-
-        print(best_snake_score)
-
-        new_games_to_play = GameWithNet.cross_over_uniform_brains(new_games_to_play, CROSS_OVER_RATE)
-        all_games += new_games_to_play
-
-    # best_snake = GameWithNet.tournament_snake_brains(all_games, len(all_games))[0]
-    best_snake.game.reset()
-    best_snake.game.tick_rate = 50
-    GameWithNet.simulate_with_video([best_snake], *best_snake.game.dims, True, True)
+    # The training loop and all of its settings live in the command line driver now
+    from snake_game.cli import main
+
+    main()
@@ -0,0 +1,133 @@
+import os
+import queue
+import random
+from multiprocessing import Pool
+
+import numpy as np
+
+from snake_game.brains import build_snake_brain, derive_seed
+from snake_game.selection import tournament
+from snake_game.snake_brain import GameWithNet
+
+
+def evaluate_params(params, topology, game_config, seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    snake_brain = build_snake_brain(game_config, params=params, topology=topology)
+    GameWithNet.simulate_no_video([snake_brain], *game_config[0])
+    return snake_brain.game.score
+
+
+class SteadyStateEvolver:
+    def __init__(self, snake_brains, screen_dims, tile_dims, mutator, num_workers=None, cross_over_prob=0.5,
+                 tournament_size=2, life_time=200, seed=0, loop_penalty=None, in_flight=None):
+        self.snake_brains = list(snake_brains)
+        self.topology = self.snake_brains[0].topology
+        self.game_config = (tuple(screen_dims), tuple(tile_dims), life_time, loop_penalty)
+        self.mutator = mutator
+        self.cross_over_prob = cross_over_prob
+        self.tournament_size = tournament_size
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
+        num_workers = os.cpu_count() if num_workers is None else num_workers
+        self.pool = Pool(num_workers)
+        # A couple of evaluations queued up per worker so none of them waits on us between results
+        self.in_flight = 2 * num_workers if in_flight is None else in_flight
+
+        # Scores stay nan until a brain's first evaluation comes back, those brains can't be picked or replaced yet
+        self.scores = np.full(len(self.snake_brains), np.nan)
+        self.results = queue.Queue()
+        self.pending = {}
+        self.evaluations = 0
+        self.replacements = 0
+        self.best_snake, self.best_score = None, -np.inf
+        self.history = []
+
+    def submit(self, snake_brain, slot=None):
+        # slot is where an initial brain lives, children only get a slot once they have earned one
+        task = self.evaluations
+        self.evaluations += 1
+        self.pending[task] = (snake_brain, slot)
+        self.pool.apply_async(evaluate_params,
+                              (snake_brain.params, self.topology, self.game_config, derive_seed(self.seed, task, 0)),
+                              callback=lambda score: self.results.put((task, score, None)),
+                              error_callback=lambda error: self.results.put((task, None, error)))
+
+    def breed(self):
+        # Tournaments only between brains that already have a score, a uniform crossover of the two winners gives
+        # two children that are both mutated and sent off
+        evaluated = np.flatnonzero(~np.isnan(self.scores))
+        winners = evaluated[tournament(self.scores[evaluated], self.tournament_size, num_selected=2, rng=self.rng)]
+        first_parent, second_parent = self.snake_brains[winners[0]], self.snake_brains[winners[1]]
+        for child in first_parent.cross_over_uniform_single(second_parent, self.cross_over_prob):
+            self.mutator.mutate_net(child)
+            self.submit(child)
+
+    def can_breed(self):
+        return np.count_nonzero(~np.isnan(self.scores)) >= 2 * self.tournament_size
+
+    def receive(self):
+        task, score, error = self.results.get()
+        if error is not None:
+            raise error
+        snake_brain, slot = self.pending.pop(task)
+
+        if slot is None:
+            # Steady state: a finished child takes the place of the current worst brain if it beat it
+            evaluated = np.flatnonzero(~np.isnan(self.scores))
+            worst = evaluated[np.argmin(self.scores[evaluated])]
+            if score > self.scores[worst]:
+                self.snake_brains[worst], self.scores[worst] = snake_brain, score
+                self.replacements += 1
+        else:
+            self.scores[slot] = score
+
+        if score > self.best_score:
+            self.best_snake, self.best_score = snake_brain, score
+        self.history.append((task, score, self.best_score))
+        return score
+
+    def run(self, num_children):
+        for slot, snake_brain in enumerate(self.snake_brains):
+            self.submit(snake_brain, slot=slot)
+
+        children_left = num_children
+        while self.pending:
+            self.receive()
+            while children_left > 0 and len(self.pending) < self.in_flight and self.can_breed():
+                self.breed()
+                children_left -= 2
+        return self.best_snake, self.best_score
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+if __name__ == "__main__":
+    import time
+
+    from snake_game.mutation import Mutator
+
+    SCREEN_WIDTH, SCREEN_HEIGHT = 400, 400
+    TILE_WIDTH, TILE_HEIGHT = 10, 10
+    NUM_SNAKES = 200
+    NUM_CHILDREN = 2000
+    NUM_WORKERS = 4
+    MUTATION_RATE = 1 / 200
+    GAME_CONFIG = ((SCREEN_WIDTH, SCREEN_HEIGHT), (TILE_WIDTH, TILE_HEIGHT), 200, 0.0)
+
+    mutator = Mutator(MUTATION_RATE, seed=0)
+    with SteadyStateEvolver([build_snake_brain(GAME_CONFIG) for _ in range(NUM_SNAKES)], (SCREEN_WIDTH, SCREEN_HEIGHT),
+                            (TILE_WIDTH, TILE_HEIGHT), mutator, num_workers=NUM_WORKERS, loop_penalty=0.0) as evolver:
+        start = time.perf_counter()
+        best_snake, best_score = evolver.run(NUM_CHILDREN)
+        print("{} evaluations in {:.2f}s, {} children kept, best score {}".format(
+            evolver.evaluations, time.perf_counter() - start, evolver.replacements, best_score))
@@ -0,0 +1,200 @@
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import tempfile
+from multiprocessing import Pool
+
+import numpy as np
+
+from snake_game.brains import derive_seed
+from snake_game.cli import DEFAULT_CONFIG, load_config, train
+
+# Lists are tried as they are, ("uniform", low, high) and ("log", low, high) ranges are only used by random sampling
+DEFAULT_SPACE = {
+    "mutation_rate": [1 / 400, 1 / 200, 1 / 100, 1 / 50],
+    "cross_over_rate": [0.1, 0.3, 0.5],
+    "tournament_size": [2, 4],
+    "hidden_layers": [[16], [32, 32], [64, 64]],
+}
+
+
+def is_range(values):
+    return isinstance(values, tuple) and len(values) == 3 and values[0] in ("uniform", "log")
+
+
+def grid(space):
+    names = sorted(space)
+    ranges = [name for name in names if is_range(space[name])]
+    if ranges:
+        raise ValueError("{} can only be sampled, run the sweep with --random to use ranges".format(", ".join(ranges)))
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def sample(values, rng):
+    if is_range(values) and values[0] == "uniform":
+        return float(rng.uniform(values[1], values[2]))
+    if is_range(values) and values[0] == "log":
+        return float(math.exp(rng.uniform(math.log(values[1]), math.log(values[2]))))
+    return values[rng.integers(len(values))]
+
+
+def random_samples(space, num_trials, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{name: sample(space[name], rng) for name in sorted(space)} for _ in range(num_trials)]
+
+
+def run_rung(trial, rung, config):
+    # Runs one trial for config["generations"] more generations, carrying its population on through the checkpoint
+    curve, steps_so_far = [], [0]
+
+    def record(generation, scores, best_score, total_steps):
+        curve.append((max(scores), total_steps - steps_so_far[0]))
+        steps_so_far[0] = total_steps
+
+    train(config, log=lambda message: None, on_generation=record)
+    return trial, rung, curve
+
+
+class Trial:
+    def __init__(self, index, params, config):
+        self.index = index
+        self.params = params
+        self.config = config
+        # Best score of each generation run so far and the game ticks it took to get there
+        self.curve = []
+        self.stopped_at = None
+
+    @property
+    def best_score(self):
+        return max((score for score, _ in self.curve), default=-math.inf)
+
+    @property
+    def total_steps(self):
+        return sum(steps for _, steps in self.curve)
+
+    def row(self):
+        row = {"trial": self.index}
+        row.update({name: json.dumps(value) if isinstance(value, list) else value
+                    for name, value in self.params.items()})
+        row.update({"generations": len(self.curve), "best_score": self.best_score, "total_steps": self.total_steps,
+                    "stopped_at_rung": self.stopped_at})
+        return row
+
+
+class Sweep:
+    def __init__(self, trial_params, base_config=None, num_workers=None, min_generations=5, max_generations=40,
+                 eta=2, seed=0, work_dir=None):
+        self.base_config = dict(DEFAULT_CONFIG if base_config is None else base_config)
+        self.num_workers = num_workers
+        # Successive halving: every rung runs the surviving trials until they have min_generations * eta ** rung
+        # generations, then only the best 1 / eta of them carry on to the next rung
+        self.min_generations = min_generations
+        self.max_generations = max_generations
+        self.eta = eta
+        self.seed = seed
+        self.work_dir = tempfile.mkdtemp(prefix="snake_sweep_") if work_dir is None else work_dir
+        os.makedirs(self.work_dir, exist_ok=True)
+
+        self.trials = []
+        for index, params in enumerate(trial_params):
+            config = dict(self.base_config)
+            config.update(params)
+            config.update({"checkpoint": os.path.join(self.work_dir, "trial_{:04d}.snet".format(index)),
+                           "workers": 1, "render": False, "watch": False, "replay_best": False, "history_dir": None,
+                           "profile": None, "save_best": None})
+            # A leftover population from an earlier sweep in the same directory would otherwise be resumed
+            if os.path.exists(config["checkpoint"]):
+                os.remove(config["checkpoint"])
+            self.trials.append(Trial(index, params, config))
+
+    def rung_budgets(self):
+        budgets, budget = [], self.min_generations
+        while budget < self.max_generations:
+            budgets.append(budget)
+            budget *= self.eta
+        return budgets + [self.max_generations]
+
+    def rung_config(self, trial, rung, generations):
+        config = dict(trial.config)
+        config["generations"] = generations
+        config["seed"] = derive_seed(self.seed, trial.index, rung)
+        return config
+
+    def run(self, log=print):
+        alive = list(self.trials)
+        with Pool(self.num_workers) as pool:
+            for rung, budget in enumerate(self.rung_budgets()):
+                tasks = [(trial.index, rung, self.rung_config(trial, rung, budget - len(trial.curve)))
+                         for trial in alive]
+                for index, _, curve in pool.starmap(run_rung, tasks):
+                    self.trials[index].curve += curve
+
+                alive.sort(key=lambda trial: trial.best_score, reverse=True)
+                log("rung {}: {} trials at {} generations, best {}".format(rung, len(alive), budget,
+                                                                           alive[0].best_score))
+                if budget >= self.max_generations:
+                    break
+                keep = max(1, int(math.ceil(len(alive) / self.eta)))
+                for trial in alive[keep:]:
+                    trial.stopped_at = rung
+                alive = alive[:keep]
+        return self.table()
+
+    def table(self):
+        return sorted((trial.row() for trial in self.trials), key=lambda row: row["best_score"], reverse=True)
+
+    @staticmethod
+    def save_table(path, rows):
+        with open(path, "w", newline="") as table_file:
+            writer = csv.DictWriter(table_file, list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def print_table(rows):
+    columns = list(rows[0])
+    widths = [max(len(str(column)), *(len(str(row[column])) for row in rows)) for column in columns]
+    print("  ".join(str(column).ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[column]).ljust(width) for column, width in zip(columns, widths)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hyperparameter sweep over the generational training loop")
+    parser.add_argument("--space", help="JSON file mapping settings to lists of values, or to [\"log\", low, high]")
+    parser.add_argument("--config", help="JSON file with the settings every trial starts from")
+    parser.add_argument("--random", type=int, help="sample this many trials instead of running the whole grid")
+    parser.add_argument("--workers", type=int, help="trials run in parallel in a pool of this many processes")
+    parser.add_argument("--min-generations", type=int, default=5, help="generations every trial gets")
+    parser.add_argument("--max-generations", type=int, default=40, help="generations the best trials get")
+    parser.add_argument("--eta", type=int, default=2, help="1 / eta of the trials survive each rung")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", help="where trial populations are kept between rungs")
+    parser.add_argument("--output", help="save the results table to this CSV file")
+    args = parser.parse_args()
+
+    space = DEFAULT_SPACE
+    if args.space is not None:
+        with open(args.space) as space_file:
+            space = {name: tuple(values) if values and values[0] in ("uniform", "log") else values
+                     for name, values in json.load(space_file).items()}
+    base_config = dict(DEFAULT_CONFIG)
+    if args.config is not None:
+        base_config.update(load_config(args.config))
+
+    if args.random is None:
+        try:
+            trial_params = grid(space)
+        except ValueError as error:
+            parser.error(str(error))
+    else:
+        trial_params = random_samples(space, args.random, seed=args.seed)
+    sweep = Sweep(trial_params, base_config, num_workers=args.workers, min_generations=args.min_generations,
+                  max_generations=args.max_generations, eta=args.eta, seed=args.seed, work_dir=args.work_dir)
+    rows = sweep.run()
+    print_table(rows)
+    if args.output is not None:
+        Sweep.save_table(args.output, rows)
@@ -1,15 +1,28 @@
-import pygame
-
-
 class TickUpdater:
-    def __init__(self, tick_rate):
-        self.clock = pygame.time.Clock()
+    __slots__ = ("clock", "tick_rate", "time_elapsed_since_tick", "realtime", "ticks_since_start")
+
+    def __init__(self, tick_rate, realtime=True):
+        # Only games that are actually paced in real time ever get a clock, see update
+        self.clock = None
         self.tick_rate = tick_rate
         self.time_elapsed_since_tick = 0
+        # When not realtime every call to update is exactly one logical tick and the clock is never consulted
+        self.realtime = realtime
 
         self.ticks_since_start = 0
 
+    def set_realtime(self, realtime):
+        self.realtime = realtime
+        self.time_elapsed_since_tick = 0
+
     def update(self):
+        if not self.realtime:
+            self.ticks_since_start += 1
+            return True
+
+        if self.clock is None:
+            from snake_game import rendering
+            self.clock = rendering.clock()
         dt = self.clock.tick()
         self.time_elapsed_since_tick += dt
 
@@ -0,0 +1,159 @@
+import queue
+import time
+from multiprocessing import Process, Queue
+
+import numpy as np
+
+BACKGROUND_COLOUR = (0, 0, 0)
+ALIVE_COLOUR = (255, 255, 255)
+DEAD_COLOUR = (128, 128, 128)
+FOOD_COLOUR = (128, 0, 0)
+
+
+class Snapshot:
+    # Per cell counts of live snake pieces, dead snake pieces and food over every game, all in board order
+    __slots__ = ("board_dims", "alive_counts", "dead_counts", "food_counts")
+
+    def __init__(self, board_dims, alive_counts, dead_counts, food_counts):
+        self.board_dims = board_dims
+        self.alive_counts = alive_counts
+        self.dead_counts = dead_counts
+        self.food_counts = food_counts
+
+    @staticmethod
+    def from_occupancy(board_dims, occupancy, alive, food_cells):
+        alive = np.asarray(alive, dtype=bool)
+        num_cells = board_dims[0] * board_dims[1]
+        food_cells = np.asarray(food_cells)
+        food_counts = np.bincount(food_cells[alive & (food_cells >= 0)], minlength=num_cells)
+        return Snapshot(tuple(board_dims), occupancy[alive].sum(axis=0, dtype=np.uint16),
+                        occupancy[~alive].sum(axis=0, dtype=np.uint16), food_counts.astype(np.uint16))
+
+    @staticmethod
+    def from_games(games):
+        snake = games[0].snake
+        occupancy = np.stack([game.snake.occupancy_grid() for game in games])
+        alive = [game.snake.alive for game in games]
+        food_cells = [game.snake.cell(game.food.pos) for game in games]
+        food_cells = [-1 if cell is None else cell for cell in food_cells]
+        return Snapshot.from_occupancy(snake.board_dims, occupancy, alive, food_cells)
+
+    @staticmethod
+    def from_batch_game(batch_game):
+        return Snapshot.from_occupancy(batch_game.board_dims, batch_game.occupancy, batch_game.alive,
+                                       batch_game.pack(batch_game.food))
+
+    def pixels(self):
+        # One RGB pixel per tile, indexed [x, y] the way surfarray expects
+        pixels = np.zeros((self.alive_counts.shape[0], 3), dtype=np.uint8)
+        pixels[:] = BACKGROUND_COLOUR
+        pixels[self.dead_counts > 0] = DEAD_COLOUR
+        pixels[self.alive_counts > 0] = ALIVE_COLOUR
+        pixels[self.food_counts > 0] = FOOD_COLOUR
+        return pixels.reshape(self.board_dims[1], self.board_dims[0], 3).transpose(1, 0, 2)
+
+
+def run_viewer(snapshots, window_dims, fps):
+    import pygame
+    from snake_game import rendering
+
+    screen = rendering.open_window(*window_dims)
+    pygame.display.set_caption("Snake training")
+    clock = rendering.clock()
+    board = None
+    snapshot = None
+
+    done = False
+    while not done:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                done = True
+
+        # Only the newest snapshot matters, anything older that piled up is skipped
+        try:
+            while True:
+                snapshot = snapshots.get_nowait()
+        except queue.Empty:
+            pass
+        if snapshot is None:
+            clock.tick(fps)
+            continue
+        if snapshot == "close":
+            break
+
+        # The whole board is one tiny surface filled in a single array copy and scaled up to the window
+        if board is None or board.get_size() != snapshot.board_dims:
+            board = pygame.Surface(snapshot.board_dims)
+        pygame.surfarray.blit_array(board, snapshot.pixels())
+        pygame.transform.scale(board, window_dims, screen)
+        pygame.display.flip()
+        clock.tick(fps)
+
+    pygame.quit()
+
+
+class Viewer:
+    def __init__(self, window_dims, fps=30):
+        self.window_dims = tuple(window_dims)
+        self.fps = fps
+        self.frame_time = 1 / fps
+        self.last_publish = -np.inf
+
+        # Room for one snapshot, if the viewer hasn't taken the last one yet the new one is dropped, never waited on
+        self.snapshots = Queue(maxsize=1)
+        self.process = Process(target=run_viewer, args=(self.snapshots, self.window_dims, fps), daemon=True)
+        self.process.start()
+        self.closed = False
+
+    def due(self):
+        # Cheap enough to ask every tick, building a snapshot is only worth it once a frame
+        if self.closed or time.perf_counter() - self.last_publish < self.frame_time:
+            return False
+        if not self.process.is_alive():
+            self.closed = True
+            return False
+        return True
+
+    def publish(self, snapshot):
+        self.last_publish = time.perf_counter()
+        try:
+            self.snapshots.put_nowait(snapshot)
+        except queue.Full:
+            pass
+
+    def close(self, timeout=5):
+        # The viewer can exit between the is_alive check and the put, leaving a snapshot nobody will take in the way,
+        # so nothing here waits forever and a viewer that doesn't stop in time is killed
+        if not self.closed and self.process.is_alive():
+            try:
+                self.snapshots.put("close", timeout=timeout)
+            except queue.Full:
+                pass
+            self.process.join(timeout=timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+if __name__ == "__main__":
+    from snake_game.batch_game import BatchGame
+
+    NUM_GAMES = 200
+    batch_game = BatchGame(NUM_GAMES, (400, 400), (10, 10), seed=0)
+    policy_rng = np.random.default_rng(1)
+
+    with Viewer((400, 400), fps=30) as viewer:
+        for _ in range(20):
+            batch_game.reset()
+            while batch_game.any_alive():
+                batch_game.step(policy_rng.integers(0, 4, size=NUM_GAMES))
+                if viewer.due():
+                    viewer.publish(Snapshot.from_batch_game(batch_game))
+                time.sleep(0.005)